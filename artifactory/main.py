@@ -1,33 +1,299 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+import anyio
+import asyncio
+import gzip
+import hashlib
+import json
 import os
-import shutil
+import re
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
 
-app = FastAPI(title="Artifactory Binary Upload API", description="API for uploading binary files to Artifactory", version="1.0.0")
-STORAGE_DIR = "binaries"
-os.makedirs(STORAGE_DIR, exist_ok=True)
+try:
+    import zstandard
+except ImportError:
+    # zstd variants are optional: pip install zstandard
+    zstandard = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    aliases.update(await asyncio.to_thread(import_legacy_files))
+    yield
+
+app = FastAPI(lifespan=lifespan, title="Artifactory Binary Upload API", description="API for uploading binary files to Artifactory", version="1.0.0")
+STORAGE_DIR = os.environ.get("ARTIFACTORY_STORAGE_DIR", "binaries")
+# Base URL written into upload responses (and so into the Registry)
+PUBLIC_URL = os.environ.get("ARTIFACTORY_PUBLIC_URL", "http://localhost:8001")
+# Also store gzip (and, with zstandard installed, zstd) variants of each binary
+PRECOMPRESS = os.environ.get("ARTIFACTORY_PRECOMPRESS", "1") == "1"
+CHUNK_SIZE = 1024 * 1024
+
+# Binaries are stored once by content under sha256/<digest>.wasm and never
+# change; aliases.json maps each uploaded filename to its current digest.
+BLOB_DIR = os.path.join(STORAGE_DIR, "sha256")
+ALIASES_PATH = os.path.join(STORAGE_DIR, "aliases.json")
+os.makedirs(BLOB_DIR, exist_ok=True)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Aliases move on every upload: clients must revalidate (cheap via ETag / 304)
+ALIAS_CACHE_CONTROL = "no-cache"
+# Content-Encoding -> variant file suffix, in order of preference
+ENCODINGS = {"zstd": ".zst", "gzip": ".gz"}
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+aliases: Dict[str, str] = {}
+aliases_lock = asyncio.Lock()
+
+def blob_path(digest: str, encoding: Optional[str] = None) -> str:
+    path = os.path.join(BLOB_DIR, f"{digest}.wasm")
+    return path + ENCODINGS[encoding] if encoding else path
+
+def immutable_path(digest: str, filename: str) -> str:
+    # The trailing filename is informational; runtimes name tools after it
+    return f"/binaries/sha256/{digest}/{filename}"
+
+def load_aliases() -> Dict[str, str]:
+    try:
+        with open(ALIASES_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_aliases(current: Dict[str, str]):
+    fd, tmp_name = tempfile.mkstemp(dir=STORAGE_DIR, suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(current, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_name, ALIASES_PATH)
+
+def write_atomically(path: str, data: bytes):
+    fd, tmp_name = tempfile.mkstemp(dir=BLOB_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+def write_variants(digest: str):
+    """
+    Pre-generates compressed variants of a blob; a variant is only kept if it
+    is actually smaller.
+    """
+    if not PRECOMPRESS:
+        return
+    with open(blob_path(digest), "rb") as f:
+        data = f.read()
+    compressors = {"gzip": lambda d: gzip.compress(d, compresslevel=9, mtime=0)}
+    if zstandard is not None:
+        compressors["zstd"] = lambda d: zstandard.ZstdCompressor(level=19).compress(d)
+    for encoding, compress in compressors.items():
+        path = blob_path(digest, encoding)
+        if os.path.exists(path):
+            continue
+        compressed = compress(data)
+        if len(compressed) < len(data):
+            write_atomically(path, compressed)
+
+def store_blob(source) -> Tuple[str, int]:
+    """
+    Streams an upload to a temp file while hashing it, then renames it to its
+    content address so readers never see a partial binary.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_name = tempfile.mkstemp(dir=BLOB_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while chunk := source.read(CHUNK_SIZE):
+                digest.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        sha256 = digest.hexdigest()
+        if os.path.exists(blob_path(sha256)):
+            # Same content uploaded before
+            os.unlink(tmp_name)
+        else:
+            os.replace(tmp_name, blob_path(sha256))
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+    write_variants(sha256)
+    return sha256, size
+
+def import_legacy_files():
+    """
+    Moves binaries stored by name (before content addressing) into the blob
+    store and aliases them under their old name.
+    """
+    current = load_aliases()
+    changed = False
+    for filename in os.listdir(STORAGE_DIR):
+        path = os.path.join(STORAGE_DIR, filename)
+        if not filename.endswith(".wasm") or not os.path.isfile(path):
+            continue
+        with open(path, "rb") as f:
+            sha256, _ = store_blob(f)
+        current.setdefault(filename, sha256)
+        os.unlink(path)
+        changed = True
+        print(f"Imported {filename} as sha256/{sha256}")
+    if changed:
+        save_aliases(current)
+    return current
+
+def etag_for(digest: str, encoding: Optional[str]) -> str:
+    # Strong ETags must differ per representation, so variants get a suffix
+    return f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+
+def not_modified(request: Request, digest: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        # Any representation of the same content is still valid
+        if tag.removeprefix("W/").strip('"').split("-")[0] == digest:
+            return True
+    return False
+
+def choose_encoding(request: Request, digest: str) -> Optional[str]:
+    accepted = {}
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, 0) > 0 and os.path.exists(blob_path(digest, encoding)):
+            return encoding
+    return None
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Returns the (start, end) of a single byte range, None to ignore the header
+    (multiple or malformed ranges get the full body), or raises 416.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise ValueError
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+async def read_file(path: str, start: int, length: int):
+    async with await anyio.open_file(path, "rb") as f:
+        await f.seek(start)
+        while length > 0:
+            chunk = await f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+def serve_blob(request: Request, digest: str, cache_control: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    headers = {
+        **(headers or {}),
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept-Encoding",
+    }
+    # Ranges address the identity bytes, so they are served uncompressed
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range and if_range != etag_for(digest, None):
+        range_header = None
+    encoding = None if range_header else choose_encoding(request, digest)
+    headers["ETag"] = etag_for(digest, encoding)
+
+    if not_modified(request, digest):
+        return Response(status_code=304, headers=headers)
+
+    path = blob_path(digest, encoding)
+    size = os.path.getsize(path)
+    start, end = 0, size - 1
+    status = 200
+    if range_header:
+        byte_range = parse_range(range_header, size)
+        if byte_range is not None:
+            start, end = byte_range
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    headers["Content-Length"] = str(end - start + 1)
+
+    if request.method == "HEAD":
+        return Response(status_code=status, headers=headers, media_type="application/wasm")
+    return StreamingResponse(read_file(path, start, end - start + 1), status_code=status,
+                             headers=headers, media_type="application/wasm")
 
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
 
-@app.get("/binaries/{filename}")
-async def get_wasm(filename: str):
-    file_path = os.path.join(STORAGE_DIR, filename)
-    if not os.path.exists(file_path):
+@app.api_route("/binaries/sha256/{digest}", methods=["GET", "HEAD"])
+@app.api_route("/binaries/sha256/{digest}/{filename}", methods=["GET", "HEAD"])
+async def get_wasm_by_digest(digest: str, request: Request, filename: Optional[str] = None):
+    if not DIGEST_RE.match(digest) or not os.path.exists(blob_path(digest)):
+        raise HTTPException(status_code=404, detail="Wasm binary not found")
+    return serve_blob(request, digest, IMMUTABLE_CACHE_CONTROL)
+
+@app.api_route("/binaries/{filename}", methods=["GET", "HEAD"])
+async def get_wasm(filename: str, request: Request):
+    digest = aliases.get(filename)
+    if digest is None or not os.path.exists(blob_path(digest)):
         raise HTTPException(status_code=404, detail="Wasm binary not found")
-    return FileResponse(path=file_path, media_type="application/wasm")
+    # Content-Location points clients at the immutable copy of this version
+    return serve_blob(request, digest, ALIAS_CACHE_CONTROL, {"Content-Location": immutable_path(digest, filename)})
 
 @app.post("/upload")
 async def upload_wasm(file: UploadFile = File(...)):
     if not file.filename.endswith(".wasm"):
         raise HTTPException(status_code=400, detail="Invalid file type")
-    file_path = os.path.join(STORAGE_DIR, file.filename)
-    with open(file_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
-    return {"url": f"http://localhost:8001/binaries/{file.filename}", "status": "success"}
+    filename = os.path.basename(file.filename)
+    sha256, size = await asyncio.to_thread(store_blob, file.file)
+    # The alias only moves once the blob (and its variants) are in place
+    async with aliases_lock:
+        aliases[filename] = sha256
+        await asyncio.to_thread(save_aliases, dict(aliases))
+    return {
+        "url": f"{PUBLIC_URL}/binaries/{filename}",
+        "immutableUrl": PUBLIC_URL + immutable_path(sha256, filename),
+        "sha256": sha256,
+        "size": size,
+        "status": "success",
+    }
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8001)
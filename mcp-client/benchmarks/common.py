@@ -0,0 +1,133 @@
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+import httpx
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+CLIENT_DIR = BENCH_DIR.parent
+SLM_DIR = CLIENT_DIR / "slm-service"
+RUNTIME_DIR = CLIENT_DIR / "wasm-runtime"
+RESULTS_DIR = BENCH_DIR / "results"
+
+# Ports of the local stand-ins started by fakes.py
+FAKE_LLM_PORT = int(os.environ.get("FAKE_LLM_PORT", "11500"))
+FAKE_METEO_PORT = int(os.environ.get("FAKE_METEO_PORT", "8770"))
+FAKE_REGISTRY_PORT = int(os.environ.get("FAKE_REGISTRY_PORT", "8771"))
+
+def fake_urls() -> Dict[str, str]:
+    return {
+        "OLLAMA_HOST": f"http://127.0.0.1:{FAKE_LLM_PORT}",
+        "GEOCODING_URL": f"http://127.0.0.1:{FAKE_METEO_PORT}/v1/search",
+        "FORECAST_URL": f"http://127.0.0.1:{FAKE_METEO_PORT}/v1/forecast",
+        "REGISTRY_URL": f"http://127.0.0.1:{FAKE_REGISTRY_PORT}/api/v1/servers",
+    }
+
+def binary_url(filename: str) -> str:
+    return f"http://127.0.0.1:{FAKE_REGISTRY_PORT}/binaries/{filename}"
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    values = sorted(samples_ms)
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+        "min_ms": round(values[0], 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "max_ms": round(values[-1], 3) if values else 0.0,
+    }
+
+def git_commit() -> str:
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=CLIENT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=CLIENT_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{sha}-dirty" if dirty else sha
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def save_results(name: str, results: Any, config: Dict[str, Any], output_dir: Optional[str] = None) -> Path:
+    """
+    Writes results to <output_dir>/<name>-<commit>-<timestamp>.json so runs
+    on different commits can be compared with compare.py.
+    """
+    out = Path(output_dir) if output_dir else RESULTS_DIR
+    out.mkdir(parents=True, exist_ok=True)
+    commit = git_commit()
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    path = out / f"{name}-{commit}-{stamp}.json"
+    payload = {
+        "benchmark": name,
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "config": config,
+        "results": results,
+    }
+    path.write_text(json.dumps(payload, indent=2))
+    print(f"Results saved to {path}")
+    return path
+
+def write_runtime_launcher(path: Path) -> Path:
+    """
+    Launcher used as RUNTIME_SCRIPT: runs runtime_service.py with this
+    interpreter instead of run.sh's own venv.
+    """
+    path.write_text(f'#!/bin/sh\ncd "{RUNTIME_DIR}"\nexec "{sys.executable}" runtime_service.py "$@"\n')
+    path.chmod(0o755)
+    return path
+
+def start_process(args: List[str], cwd: Path, env: Dict[str, str], log_path: Path) -> subprocess.Popen:
+    log = open(log_path, "w")
+    return subprocess.Popen(args, cwd=cwd, env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT)
+
+def stop_process(proc: subprocess.Popen):
+    if proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+def wait_http(url: str, timeout: float = 60, expect_status: int = 200):
+    deadline = time.monotonic() + timeout
+    last_error = None
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code == expect_status:
+                return
+        except httpx.HTTPError as e:
+            last_error = e
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not up after {timeout}s ({last_error})")
+
+def start_fakes(log_dir: Path, **options: float) -> subprocess.Popen:
+    """
+    Starts fakes.py; options map to its flags, e.g. llm_latency_ms=50.
+    """
+    args = [sys.executable, "fakes.py"]
+    for key, value in options.items():
+        args += ["--" + key.replace("_", "-"), str(value)]
+    proc = start_process(args, cwd=BENCH_DIR, env={}, log_path=log_dir / "fakes.log")
+    try:
+        wait_http(fake_urls()["REGISTRY_URL"], timeout=30)
+    except RuntimeError:
+        stop_process(proc)
+        raise
+    return proc
@@ -0,0 +1,62 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+# Compares two result files of the same benchmark (e.g. from two commits):
+#
+#   python compare.py results/load-abc123-*.json results/load-def456-*.json
+#
+# Exits non-zero when a latency or throughput metric regressed by more than
+# --threshold percent.
+
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+THROUGHPUT_METRICS = ("throughput_rps",)
+
+def rows(payload: Dict[str, Any]) -> Dict[Tuple, Dict[str, Any]]:
+    results = payload["results"]
+    if isinstance(results, dict):
+        # micro: {name: stats}
+        return {(name,): stats for name, stats in results.items()}
+    # load: [{scenario, concurrency, ...}]
+    return {(row["scenario"], f"c={row['concurrency']}"): row for row in results}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed regression in percent")
+    args = parser.parse_args()
+
+    base = json.loads(Path(args.baseline).read_text())
+    cand = json.loads(Path(args.candidate).read_text())
+    if base["benchmark"] != cand["benchmark"]:
+        sys.exit(f"Cannot compare {base['benchmark']} with {cand['benchmark']} results")
+    if base.get("config") != cand.get("config"):
+        print("Warning: runs used different configurations")
+
+    print(f"{base['benchmark']}: {base['commit']} -> {cand['commit']}")
+    base_rows, cand_rows = rows(base), rows(cand)
+    regressions = 0
+    for key in base_rows:
+        if key not in cand_rows:
+            continue
+        for metric in LATENCY_METRICS + THROUGHPUT_METRICS:
+            old, new = base_rows[key].get(metric), cand_rows[key].get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            # Higher latency is worse; lower throughput is worse
+            worse = change if metric in LATENCY_METRICS else -change
+            flag = ""
+            if worse > args.threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{' '.join(key):<36} {metric:<15} {old:>10.2f} -> {new:>10.2f}  {change:>+7.1f}%{flag}")
+
+    if regressions:
+        sys.exit(f"{regressions} metric(s) regressed by more than {args.threshold}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+import time
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, List
+
+from common import FAKE_LLM_PORT, FAKE_METEO_PORT, FAKE_REGISTRY_PORT, binary_url
+
+# Local stand-ins for Ollama, Open-Meteo and the Registry (+ binary hosting),
+# so benchmarks measure this code rather than a model or the internet.
+
+# Artificial latency, set from the command line
+settings = {"llm_latency_ms": 0.0, "token_delay_ms": 0.0, "upstream_latency_ms": 0.0}
+
+# Smallest valid component; wasmtime accepts the text format. The runtime
+# serves the tools in simulation mode, so the body is not executed.
+COMPONENT_WAT = '(component (core module (func (export "run"))))\n'
+
+def component_binary(padding_kb: int) -> bytes:
+    # Padding (a WAT comment) only makes download and hashing cost realistic
+    return (COMPONENT_WAT + (";; " + "x" * 1021 + "\n") * padding_kb).encode()
+
+async def delay(ms: float):
+    if ms > 0:
+        await asyncio.sleep(ms / 1000)
+
+# --- Ollama: scripted tool calls ---------------------------------------------
+
+llm_app = FastAPI()
+
+def script_reply(messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    A two-tool conversation: get_weather for the city in the user's message,
+    then get_activity_recommendation from its result, then a final answer.
+    """
+    offered = {t.get("function", {}).get("name") for t in tools or []}
+    last_user = max((i for i, m in enumerate(messages) if m.get("role") in ("user", "system")), default=-1)
+    tool_results = [m for m in messages[last_user + 1:] if m.get("role") == "tool"]
+    user_text = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+    match = re.search(r"\bin ([A-Z][a-zA-Z]+)", user_text)
+    city = match.group(1) if match else "Pune"
+
+    if not tool_results and "get_weather" in offered:
+        return {"role": "assistant", "content": "",
+                "tool_calls": [{"function": {"name": "get_weather", "arguments": {"city": city}}}]}
+    if len(tool_results) == 1 and "get_activity_recommendation" in offered:
+        try:
+            weather = json.loads(tool_results[0].get("content") or "{}")
+        except ValueError:
+            weather = {}
+        arguments = {"condition": weather.get("condition", "Sunny"), "temp": weather.get("temp", 25)}
+        return {"role": "assistant", "content": "",
+                "tool_calls": [{"function": {"name": "get_activity_recommendation", "arguments": arguments}}]}
+    last = tool_results[-1].get("content") if tool_results else "No tools were needed."
+    return {"role": "assistant", "content": f"Here is what I found for {city}. {last}"}
+
+@llm_app.post("/api/chat")
+async def chat(request: Request):
+    body = await request.json()
+    reply = script_reply(body["messages"], body.get("tools"))
+    base = {"model": body.get("model", "fake"), "created_at": "2024-01-01T00:00:00Z"}
+    await delay(settings["llm_latency_ms"])
+
+    if not body.get("stream", True):
+        return {**base, "message": reply, "done": True}
+
+    async def ndjson():
+        if reply.get("tool_calls"):
+            yield json.dumps({**base, "message": reply, "done": False}) + "\n"
+        else:
+            for token in re.findall(r"\S+\s*", reply["content"]):
+                await delay(settings["token_delay_ms"])
+                yield json.dumps({**base, "message": {"role": "assistant", "content": token}, "done": False}) + "\n"
+        yield json.dumps({**base, "message": {"role": "assistant", "content": ""}, "done": True}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+# --- Open-Meteo ----------------------------------------------------------------
+
+meteo_app = FastAPI()
+meteo_counts = {"search": 0, "forecast": 0}
+
+@meteo_app.get("/v1/search")
+async def search(name: str, count: int = 1):
+    meteo_counts["search"] += 1
+    await delay(settings["upstream_latency_ms"])
+    # Stable per-city coordinates so the runtime's weather cache keys differ per city
+    h = int(hashlib.sha256(name.lower().encode()).hexdigest()[:8], 16)
+    return {"results": [{"name": name, "latitude": round(h % 18000 / 100 - 90, 2),
+                         "longitude": round(h % 36000 / 100 - 180, 2)}]}
+
+@meteo_app.get("/v1/forecast")
+async def forecast(latitude: float, longitude: float, current_weather: str = "true"):
+    meteo_counts["forecast"] += 1
+    await delay(settings["upstream_latency_ms"])
+    code = [0, 2, 61, 3, 80][int(abs(latitude * 100)) % 5]
+    return {"current_weather": {"temperature": round(10 + abs(longitude) % 25, 1), "weathercode": code,
+                                "time": time.strftime("%Y-%m-%dT%H:00")}}
+
+@meteo_app.get("/counts")
+async def counts():
+    return meteo_counts
+
+# --- Registry + binary hosting -------------------------------------------------
+
+registry_app = FastAPI()
+binaries: Dict[str, bytes] = {}
+
+def registry_servers() -> List[Dict[str, Any]]:
+    return [
+        {"name": "weather-tool", "binaryUrl": binary_url("weather-tool.wasm"), "version": "1.0.0",
+         "description": "Weather lookups", "runtimeConfig": {}, "updatedAt": "2024-01-01T00:00:00"},
+        {"name": "activity-advisor", "binaryUrl": binary_url("activity-advisor.wasm"), "version": "1.0.0",
+         "description": "Activity recommendations", "runtimeConfig": {}, "updatedAt": "2024-01-01T00:00:00"},
+    ]
+
+def etag_response(request: Request, content: bytes, media_type: str) -> Response:
+    etag = '"' + hashlib.sha256(content).hexdigest() + '"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=content, media_type=media_type, headers={"ETag": etag})
+
+@registry_app.get("/api/v1/servers")
+async def list_servers(request: Request):
+    return etag_response(request, json.dumps(registry_servers()).encode(), "application/json")
+
+@registry_app.get("/binaries/{filename}")
+async def get_binary(filename: str, request: Request):
+    if filename not in binaries:
+        return Response(status_code=404)
+    return etag_response(request, binaries[filename], "application/wasm")
+
+async def serve(padding_kb: int):
+    for name in ("weather-tool.wasm", "activity-advisor.wasm"):
+        binaries[name] = component_binary(padding_kb)
+    servers = [
+        uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        for app, port in ((llm_app, FAKE_LLM_PORT), (meteo_app, FAKE_METEO_PORT), (registry_app, FAKE_REGISTRY_PORT))
+    ]
+    await asyncio.gather(*(server.serve() for server in servers))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-latency-ms", type=float, default=0, help="Delay before each model reply")
+    parser.add_argument("--token-delay-ms", type=float, default=0, help="Delay between streamed tokens")
+    parser.add_argument("--upstream-latency-ms", type=float, default=0, help="Delay of each Open-Meteo response")
+    parser.add_argument("--binary-kb", type=int, default=0, help="Pad served binaries to roughly this size")
+    args = parser.parse_args()
+    settings.update(llm_latency_ms=args.llm_latency_ms, token_delay_ms=args.token_delay_ms,
+                    upstream_latency_ms=args.upstream_latency_ms)
+    asyncio.run(serve(args.binary_kb))
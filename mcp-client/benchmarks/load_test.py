@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+import httpx
+from pathlib import Path
+from typing import Any, Dict, List
+
+from common import (
+    SLM_DIR,
+    fake_urls,
+    save_results,
+    start_fakes,
+    start_process,
+    stop_process,
+    summarize,
+    wait_http,
+    write_runtime_launcher,
+)
+
+# Load test of the real slm_server app (+ real runtimes) against fakes.py.
+#
+#   python load_test.py --concurrency 1,4,16,64 --requests 200
+
+CITIES = [
+    "Pune", "Bangalore", "Gurgaon", "Mumbai", "Delhi", "Chennai", "Kolkata", "Hyderabad",
+    "London", "Paris", "Berlin", "Madrid", "Rome", "Tokyo", "Seoul", "Sydney",
+]
+
+def call_request(rng: random.Random) -> Dict[str, Any]:
+    return {"name": "get_weather", "arguments": {"city": rng.choice(CITIES)}}
+
+def chat_request(rng: random.Random) -> Dict[str, Any]:
+    return {"messages": [{"role": "user", "content": f"What should I do in {rng.choice(CITIES)} today?"}]}
+
+SCENARIOS = {
+    # path, request body factory
+    "call": ("/call", call_request),
+    "chat": ("/chat", chat_request),
+}
+
+def wait_all_runtimes(base_url: str, timeout: float = 120):
+    """
+    /ready turns 200 with the first tool; a run needs every runtime up.
+    """
+    wait_http(f"{base_url}/ready", timeout=timeout)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = httpx.get(f"{base_url}/ready", timeout=5).json()
+        if status["status"] == "ready":
+            print(f"Orchestrator ready with tools {status['tools']}")
+            return
+        if status["status"] == "degraded":
+            raise RuntimeError(f"Runtimes failed to start: {status['runtimes']}")
+        time.sleep(0.2)
+    raise RuntimeError(f"Runtimes not ready after {timeout}s")
+
+async def run_level(client: httpx.AsyncClient, path: str, make_body, concurrency: int, total: int,
+                    seed: int) -> Dict[str, Any]:
+    """
+    Sends `total` requests from `concurrency` closed-loop workers.
+    """
+    rng = random.Random(seed)
+    bodies = [make_body(rng) for _ in range(total)]
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < total:
+            body = bodies[next_index]
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                resp = await client.post(path, json=body)
+                if resp.status_code != 200:
+                    errors[str(resp.status_code)] = errors.get(str(resp.status_code), 0) + 1
+                    continue
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        **summarize(latencies),
+    }
+
+async def run_scenarios(base_url: str, scenarios: List[str], levels: List[int], total: int, warmup: int) -> List[Dict[str, Any]]:
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    results = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=httpx.Timeout(120.0), limits=limits) as client:
+        for scenario in scenarios:
+            path, make_body = SCENARIOS[scenario]
+            if warmup:
+                await run_level(client, path, make_body, min(levels), warmup, seed=0)
+            for concurrency in levels:
+                row = {"scenario": scenario, **await run_level(client, path, make_body, concurrency, total, seed=concurrency)}
+                results.append(row)
+                print(
+                    f"{scenario:<5} c={concurrency:<4} {row['throughput_rps']:>9.1f} req/s  "
+                    f"p50 {row['p50_ms']:>8.1f}ms  p95 {row['p95_ms']:>8.1f}ms  p99 {row['p99_ms']:>8.1f}ms  "
+                    f"errors {sum(row['errors'].values())}"
+                )
+    return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", default="call,chat", help="Comma-separated: call, chat")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and level")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests before each scenario")
+    parser.add_argument("--port", type=int, default=8600, help="Port for the orchestrator under test")
+    parser.add_argument("--runtime-mode", default="per-tool", choices=["per-tool", "shared"])
+    parser.add_argument("--replicas", type=int, default=1, help="Runtime processes per tool (RUNTIME_REPLICAS)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Orchestrator workers; with more than one, runtimes come from runtime_pool.py")
+    parser.add_argument("--llm-latency-ms", type=float, default=0)
+    parser.add_argument("--upstream-latency-ms", type=float, default=0)
+    parser.add_argument("--output", help="Results directory (default benchmarks/results)")
+    parser.add_argument("--work-dir", help="Keep process logs and the tool cache here instead of a temp dir")
+    args = parser.parse_args()
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Unknown scenarios: {sorted(unknown)}")
+
+    with tempfile.TemporaryDirectory(prefix="slm-bench-") as tmp:
+        tmp_dir = Path(args.work_dir or tmp)
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fakes = start_fakes(tmp_dir, llm_latency_ms=args.llm_latency_ms, upstream_latency_ms=args.upstream_latency_ms)
+        server = pool = None
+        try:
+            env = {
+                **fake_urls(),
+                "RUNTIME_SCRIPT": str(write_runtime_launcher(tmp_dir / "runtime.sh")),
+                "RUNTIME_MODE": args.runtime_mode,
+                "RUNTIME_REPLICAS": str(args.replicas),
+                "TOOL_CACHE_DIR": str(tmp_dir / "tool-cache"),
+                "REGISTRY_SYNC_INTERVAL": "0",
+            }
+            if args.workers > 1:
+                env["RUNTIME_POOL_DIR"] = str(tmp_dir / "pool")
+                pool = start_process([sys.executable, "runtime_pool.py"], cwd=SLM_DIR, env=env,
+                                     log_path=tmp_dir / "runtime_pool.log")
+            server = start_process(
+                [sys.executable, "-m", "uvicorn", "slm_server:app", "--port", str(args.port),
+                 "--workers", str(args.workers), "--log-level", "warning"],
+                cwd=SLM_DIR, env=env, log_path=tmp_dir / "slm_server.log",
+            )
+            base_url = f"http://127.0.0.1:{args.port}"
+            wait_all_runtimes(base_url)
+
+            results = asyncio.run(run_scenarios(base_url, scenarios, levels, args.requests, args.warmup))
+        finally:
+            if server is not None:
+                stop_process(server)
+            if pool is not None:
+                stop_process(pool)
+            stop_process(fakes)
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "work_dir")}
+    save_results("load", results, config, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+from common import RUNTIME_DIR, binary_url, fake_urls, save_results, start_fakes, stop_process, summarize
+
+# Micro-benchmarks of the runtime's startup path against fakes.py:
+# ToolManager.get_tool, RuntimeService.load_tool, whole-process startup and
+# per-tool vs shared runtimes, each with a cold (empty) and warm (populated)
+# tool cache.
+#
+#   python micro_bench.py --iterations 20
+
+sys.path.insert(0, str(RUNTIME_DIR))
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from manager import ToolManager
+from runtime_service import RuntimeService
+
+# "Runtime ready: ... max RSS <n>MiB" printed by runtime_service.py
+RSS_RE = re.compile(r"max RSS ([0-9.]+)MiB")
+
+WEATHER_URL = binary_url("weather-tool.wasm")
+ACTIVITY_URL = binary_url("activity-advisor.wasm")
+
+async def measure(iterations: int, setup: Callable[[], Awaitable[Any]], run: Callable[[Any], Awaitable[Any]],
+                  teardown: Callable[[Any], Awaitable[Any]] = None) -> Dict[str, float]:
+    """
+    Times `run(state)` only; setup and teardown are excluded.
+    """
+    samples: List[float] = []
+    for _ in range(iterations):
+        state = await setup()
+        try:
+            started = time.perf_counter()
+            await run(state)
+            samples.append((time.perf_counter() - started) * 1000)
+        finally:
+            if teardown is not None:
+                await teardown(state)
+    return summarize(samples)
+
+async def bench_get_tool(iterations: int, work_dir: Path) -> Dict[str, Dict[str, float]]:
+    async def fresh():
+        return ToolManager(tempfile.mkdtemp(dir=work_dir))
+
+    warm_manager = ToolManager(tempfile.mkdtemp(dir=work_dir))
+    await warm_manager.get_tool(WEATHER_URL)
+
+    async def warm():
+        return warm_manager
+
+    async def get(manager: ToolManager):
+        await manager.get_tool(WEATHER_URL)
+
+    async def close(manager: ToolManager):
+        await manager.aclose()
+
+    async def get_concurrent(manager: ToolManager):
+        # Concurrent requests for one URL should share a single download
+        await asyncio.gather(*(manager.get_tool(WEATHER_URL) for _ in range(8)))
+
+    results = {
+        "get_tool.cold": await measure(iterations, fresh, get, close),
+        "get_tool.warm": await measure(iterations, warm, get),
+        "get_tool.cold_x8_concurrent": await measure(iterations, fresh, get_concurrent, close),
+    }
+    await warm_manager.aclose()
+    return results
+
+async def bench_load_tool(iterations: int, work_dir: Path) -> Dict[str, Dict[str, float]]:
+    warm_dir = tempfile.mkdtemp(dir=work_dir)
+    service = RuntimeService(warm_dir)
+    await service.load_tool(WEATHER_URL)
+    await close_service(service)
+
+    async def cold():
+        return RuntimeService(tempfile.mkdtemp(dir=work_dir))
+
+    async def warm():
+        return RuntimeService(warm_dir)
+
+    async def load(service: RuntimeService):
+        await service.load_tool(WEATHER_URL)
+
+    async def construct(_):
+        await close_service(RuntimeService(tempfile.mkdtemp(dir=work_dir)))
+
+    async def nothing():
+        return None
+
+    return {
+        "runtime_service.init": await measure(iterations, nothing, construct),
+        "load_tool.cold": await measure(iterations, cold, load, close_service),
+        "load_tool.warm": await measure(iterations, warm, load, close_service),
+    }
+
+async def close_service(service: RuntimeService):
+    await service.aclose()
+
+async def runtime_startup(urls: List[str], cache_dir: str) -> float:
+    """
+    Spawns runtime_service.py and waits until it has listed its tools, as
+    the orchestrator does. Returns the max RSS (MiB) the runtime reported
+    once its tools were loaded.
+    """
+    args = ["runtime_service.py"]
+    for url in urls:
+        args += ["--url", url]
+    params = StdioServerParameters(
+        command=sys.executable, args=args, cwd=str(RUNTIME_DIR),
+        env={**os.environ, **fake_urls(), "TOOL_CACHE_DIR": cache_dir},
+    )
+    with tempfile.TemporaryFile("w+") as errlog:
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                result = await session.list_tools()
+        errlog.seek(0)
+        rss = RSS_RE.search(errlog.read())
+    if not result.tools:
+        raise RuntimeError(f"Runtime for {urls} listed no tools")
+    return float(rss.group(1)) if rss else 0.0
+
+async def bench_runtime_startup(iterations: int, work_dir: Path) -> Dict[str, Dict[str, float]]:
+    warm_dir = tempfile.mkdtemp(dir=work_dir)
+    await runtime_startup([WEATHER_URL, ACTIVITY_URL], warm_dir)
+
+    async def cold():
+        return tempfile.mkdtemp(dir=work_dir)
+
+    async def warm():
+        return warm_dir
+
+    results = {}
+    for label, urls in (("one_tool", [WEATHER_URL]), ("two_tools", [WEATHER_URL, ACTIVITY_URL])):
+        results[f"runtime_startup.{label}.cold"] = await measure(iterations, cold, lambda d: runtime_startup(urls, d))
+        results[f"runtime_startup.{label}.warm"] = await measure(iterations, warm, lambda d: runtime_startup(urls, d))
+    return results
+
+async def bench_runtime_modes(iterations: int, work_dir: Path) -> Dict[str, Dict[str, float]]:
+    """
+    RUNTIME_MODE=per-tool vs shared for the same tools: time until every
+    runtime has listed its tools (started concurrently, as the orchestrator
+    does) and the resident memory of all runtime processes together.
+    """
+    urls = [WEATHER_URL, ACTIVITY_URL]
+    warm_dir = tempfile.mkdtemp(dir=work_dir)
+    await runtime_startup(urls, warm_dir)
+
+    async def per_tool(cache_dir: str) -> float:
+        return sum(await asyncio.gather(*(runtime_startup([url], cache_dir) for url in urls)))
+
+    async def shared(cache_dir: str) -> float:
+        return await runtime_startup(urls, cache_dir)
+
+    results = {}
+    for mode, start in (("per_tool", per_tool), ("shared", shared)):
+        for cache in ("cold", "warm"):
+            samples, rss = [], []
+            for _ in range(iterations):
+                cache_dir = warm_dir if cache == "warm" else tempfile.mkdtemp(dir=work_dir)
+                started = time.perf_counter()
+                rss.append(await start(cache_dir))
+                samples.append((time.perf_counter() - started) * 1000)
+            results[f"runtime_modes.{mode}.{cache}"] = {
+                **summarize(samples),
+                "processes": len(urls) if mode == "per_tool" else 1,
+                "rss_mib": round(sum(rss) / len(rss), 1),
+            }
+    return results
+
+BENCHMARKS = {
+    "get_tool": bench_get_tool,
+    "load_tool": bench_load_tool,
+    "runtime_startup": bench_runtime_startup,
+    "runtime_modes": bench_runtime_modes,
+}
+
+async def run_benchmarks(names: List[str], iterations: int, work_dir: Path) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name in names:
+        for key, stats in (await BENCHMARKS[name](iterations, work_dir)).items():
+            results[key] = stats
+            print(f"{key:<36} p50 {stats['p50_ms']:>9.2f}ms  p95 {stats['p95_ms']:>9.2f}ms  "
+                  f"p99 {stats['p99_ms']:>9.2f}ms  mean {stats['mean_ms']:>9.2f}ms"
+                  + (f"  rss {stats['rss_mib']:>7.1f}MiB" if "rss_mib" in stats else ""))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS), help="Comma-separated: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--binary-kb", type=int, default=512, help="Size of the served tool binaries")
+    parser.add_argument("--output", help="Results directory (default benchmarks/results)")
+    args = parser.parse_args()
+
+    names = [n for n in args.benchmarks.split(",") if n]
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        sys.exit(f"Unknown benchmarks: {sorted(unknown)}")
+
+    with tempfile.TemporaryDirectory(prefix="slm-micro-") as tmp:
+        work_dir = Path(tmp)
+        fakes = start_fakes(work_dir, binary_kb=args.binary_kb)
+        try:
+            results = asyncio.run(run_benchmarks(names, args.iterations, work_dir))
+        finally:
+            stop_process(fakes)
+
+    save_results("micro", results, {k: v for k, v in vars(args).items() if k != "output"}, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional
+
+from telemetry import QUEUE_ACTIVE, QUEUE_DEPTH, QUEUE_REJECTED, QUEUE_WAIT
+
+# Interactive /chat requests served at once; more wait in a queue of at most
+# CHAT_QUEUE_SIZE for up to CHAT_QUEUE_TIMEOUT seconds
+CHAT_MAX_ACTIVE = int(os.environ.get("CHAT_MAX_ACTIVE", "16"))
+CHAT_QUEUE_SIZE = int(os.environ.get("CHAT_QUEUE_SIZE", "64"))
+CHAT_QUEUE_TIMEOUT = float(os.environ.get("CHAT_QUEUE_TIMEOUT", "10"))
+# Same for bulk /call requests (each /call/batch item counts as one)
+CALL_MAX_ACTIVE = int(os.environ.get("CALL_MAX_ACTIVE", "64"))
+CALL_QUEUE_SIZE = int(os.environ.get("CALL_QUEUE_SIZE", "1024"))
+CALL_QUEUE_TIMEOUT = float(os.environ.get("CALL_QUEUE_TIMEOUT", "30"))
+
+# Priorities at shared limits (LLM and tool tokens): lower is served first
+INTERACTIVE = 0
+BULK = 1
+
+# Priority of the request being served, set on admission
+priority_var: ContextVar[int] = ContextVar("priority", default=INTERACTIVE)
+
+class Overloaded(Exception):
+    """
+    A request turned away by a Limiter: 429 when the queue is full, 503 when
+    it waited past the queue deadline.
+    """
+
+    def __init__(self, queue: str, status_code: int, detail: str, retry_after: float = 1.0):
+        super().__init__(detail)
+        self.queue = queue
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class Limiter:
+    """
+    At most `limit` holders at once. Others wait in FIFO order per priority,
+    and a freed slot goes to the highest priority waiting. The queue holds
+    at most `max_queue` waiters (0: unbounded), each for at most `timeout`
+    seconds (None: no deadline).
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int = 0, timeout: Optional[float] = None):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: Dict[int, Deque[asyncio.Future]] = {}
+
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self._waiters.values())
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[int] = None):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: Optional[int] = None):
+        """
+        Takes a slot, waiting for one if needed. Raises Overloaded if the
+        queue is full or the deadline passes first.
+        """
+        priority = priority_var.get() if priority is None else priority
+        started = time.perf_counter()
+        if self.active < self.limit and not self.waiting():
+            self.active += 1
+            QUEUE_ACTIVE.labels(queue=self.name).set(self.active)
+            QUEUE_WAIT.labels(queue=self.name).observe(0)
+            return
+        if self.max_queue and self.waiting() >= self.max_queue:
+            self._reject("queue_full", 429, f"Too many {self.name} requests queued; retry later.")
+
+        future = asyncio.get_running_loop().create_future()
+        queue = self._waiters.setdefault(priority, deque())
+        queue.append(future)
+        QUEUE_DEPTH.labels(queue=self.name).set(self.waiting())
+        try:
+            await asyncio.wait_for(future, self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as this request gave up
+                self.release()
+            elif future in queue:
+                queue.remove(future)
+            QUEUE_DEPTH.labels(queue=self.name).set(self.waiting())
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject("deadline", 503, f"No {self.name} capacity within {self.timeout:g}s; retry later.")
+            raise
+        QUEUE_WAIT.labels(queue=self.name).observe(time.perf_counter() - started)
+
+    def release(self):
+        for priority in sorted(self._waiters):
+            queue = self._waiters[priority]
+            while queue:
+                future = queue.popleft()
+                if not future.done():
+                    # Hand the slot straight to the next waiter
+                    future.set_result(None)
+                    QUEUE_DEPTH.labels(queue=self.name).set(self.waiting())
+                    return
+        self.active -= 1
+        QUEUE_ACTIVE.labels(queue=self.name).set(self.active)
+
+    def _reject(self, reason: str, status_code: int, detail: str):
+        QUEUE_REJECTED.labels(queue=self.name, reason=reason).inc()
+        raise Overloaded(self.name, status_code, detail)
+
+    def stats(self) -> Dict[str, int]:
+        return {"active": self.active, "limit": self.limit, "waiting": self.waiting()}
+
+# Front door: interactive and bulk traffic get separate slots and queues, so
+# a burst of one cannot fill the other's queue
+admission: Dict[str, Limiter] = {
+    "chat": Limiter("chat", CHAT_MAX_ACTIVE, CHAT_QUEUE_SIZE, CHAT_QUEUE_TIMEOUT),
+    "call": Limiter("call", CALL_MAX_ACTIVE, CALL_QUEUE_SIZE, CALL_QUEUE_TIMEOUT),
+}
+
+def set_priority(traffic: str):
+    priority_var.set(INTERACTIVE if traffic == "chat" else BULK)
+
+@asynccontextmanager
+async def admit(traffic: str):
+    """
+    Holds a front-door slot for a "chat" or "call" request and tags the
+    request's LLM and tool calls with its priority.
+    """
+    set_priority(traffic)
+    async with admission[traffic].slot():
+        yield
@@ -0,0 +1,64 @@
+import os
+import time
+
+# Consecutive failed calls (timeouts, broken sessions) that open a tool's breaker
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "3"))
+# Seconds an open breaker rejects calls before letting a trial call through
+CIRCUIT_COOLDOWN = float(os.environ.get("CIRCUIT_COOLDOWN", "15"))
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Tool {name} is temporarily unavailable (circuit open, retry in {retry_after:.0f}s).")
+        self.name = name
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """
+    Per-tool circuit breaker. After `threshold` consecutive failures calls
+    fail immediately for `cooldown` seconds; then a single trial call is let
+    through ("half-open") and its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, name: str, threshold: int = CIRCUIT_FAILURE_THRESHOLD, cooldown: float = CIRCUIT_COOLDOWN):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        # "closed" | "open" | "half-open"
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_inflight = False
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def before_call(self):
+        """
+        Raises CircuitOpenError if the call must not go through.
+        """
+        if self.state == "open":
+            if self.retry_after() > 0:
+                raise CircuitOpenError(self.name, self.retry_after())
+            self.state = "half-open"
+        if self.state == "half-open":
+            if self._trial_inflight:
+                raise CircuitOpenError(self.name, self.cooldown)
+            self._trial_inflight = True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._trial_inflight = False
+
+    def record_failure(self):
+        self._trial_inflight = False
+        self.failures += 1
+        if self.state == "half-open" or self.failures >= self.threshold:
+            if self.state != "open":
+                print(f"Circuit for {self.name} opened after {self.failures} failure(s).")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def record_cancelled(self):
+        # A cancelled trial call says nothing about the tool's health
+        self._trial_inflight = False
@@ -1,36 +1,169 @@
+import os
+import time
+import asyncio
+import httpx
 import ollama
-from typing import List, Dict, Any
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, AsyncIterator
+
+from admission import Limiter
+from telemetry import LLM_LATENCY, LLM_QUEUE_WAIT, span
+
+# Configuration (overridable via environment)
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "4"))
+# Max seconds a model call waits for a concurrency slot before the request is rejected (503)
+LLM_QUEUE_TIMEOUT = float(os.environ.get("LLM_QUEUE_TIMEOUT", "30"))
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", "5"))
+LLM_REQUEST_TIMEOUT = float(os.environ.get("LLM_REQUEST_TIMEOUT", "120"))
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "16"))
+# How long Ollama keeps the model (and its prompt cache) loaded after a call
+LLM_KEEP_ALIVE = os.environ.get("LLM_KEEP_ALIVE", "30m")
+# Streamed chunks buffered ahead of a slow client; only a client this far
+# behind keeps the model's concurrency slot busy
+LLM_STREAM_BUFFER = int(os.environ.get("LLM_STREAM_BUFFER", "4096"))
+
+def to_ollama_tools(tools: Optional[List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Converts MCP tools to the Ollama tools format. Tools that are already in
+    that format (e.g. from a ToolCatalog) are passed through unchanged.
+    """
+    # Ollama expects: { "type": "function", "function": { "name": ..., "description": ..., "parameters": ... } }
+    if not tools:
+        return None
+    return [
+        tool if tool.get("type") == "function" else {
+            "type": "function",
+            "function": {
+                "name": tool["name"],
+                "description": tool.get("description", ""),
+                "parameters": tool.get("inputSchema", {})
+            }
+        }
+        for tool in tools
+    ]
 
 class LLMClient:
-    def __init__(self, model: str = "functiongemma:latest"):
+    def __init__(
+        self,
+        model: str = "functiongemma:latest",
+        host: str = OLLAMA_HOST,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        timeout: Optional[httpx.Timeout] = None,
+        keep_alive: Optional[str] = LLM_KEEP_ALIVE,
+    ):
         self.model = model
-        self.client = ollama.Client(host='http://localhost:11434')
+        self.keep_alive = keep_alive or None
+        # One pooled keep-alive connection set shared by every /chat request.
+        # The AsyncClient forwards extra kwargs to httpx.AsyncClient.
+        self.transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS,
+            ),
+        )
+        self.client = ollama.AsyncClient(
+            host=host,
+            timeout=timeout or httpx.Timeout(LLM_REQUEST_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+            transport=self.transport,
+        )
+        # Caps the number of in-flight model calls; extra callers wait their turn
+        # (interactive requests first) without blocking the event loop.
+        self.limiter = Limiter("llm", max_concurrency, timeout=LLM_QUEUE_TIMEOUT)
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Holds one of the concurrency slots, recording how long it took to get it.
+        """
+        started = time.perf_counter()
+        async with self.limiter.slot():
+            LLM_QUEUE_WAIT.observe(time.perf_counter() - started)
+            yield
 
     async def chat(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Sends a chat request to Ollama.
         """
-        # Convert MCP tools to Ollama tools format if necessary
-        # Ollama expects: { "type": "function", "function": { "name": ..., "description": ..., "parameters": ... } }
-        ollama_tools = []
-        if tools:
-            for tool in tools:
-                ollama_tools.append({
-                    "type": "function",
-                    "function": {
-                        "name": tool["name"],
-                        "description": tool.get("description", ""),
-                        "parameters": tool.get("inputSchema", {})
-                    }
-                })
-
         try:
-            response = self.client.chat(
-                model=self.model,
-                messages=messages,
-                tools=ollama_tools if ollama_tools else None,
-            )
+            async with self.slot():
+                with span("llm.chat", LLM_LATENCY, {"mode": "chat"}, model=self.model, messages=len(messages)):
+                    response = await self.client.chat(
+                        model=self.model,
+                        messages=messages,
+                        tools=to_ollama_tools(tools),
+                        keep_alive=self.keep_alive,
+                    )
             return response['message']
         except Exception as e:
             print(f"Error calling Ollama: {e}")
             raise e
+
+    async def chat_stream(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams a chat request to Ollama. Yields {"type": "token", "content": ...}
+        for each content chunk, then {"type": "message", "message": ...} with the
+        assembled assistant message (including any tool calls).
+
+        Generation runs in its own task that gives the concurrency slot back as
+        soon as the model is done, however slowly the caller drains the tokens.
+        """
+        queue: asyncio.Queue = asyncio.Queue(LLM_STREAM_BUFFER)
+        generation = asyncio.create_task(self._generate(messages, tools, queue))
+        content = []
+        tool_calls = []
+        try:
+            while True:
+                msg = await queue.get()
+                if msg is None:
+                    break
+                if msg.get('content'):
+                    content.append(msg['content'])
+                    yield {"type": "token", "content": msg['content']}
+                for tool_call in msg.get('tool_calls') or []:
+                    tool_calls.append(tool_call.model_dump() if hasattr(tool_call, "model_dump") else tool_call)
+            # Re-raises a failed generation
+            await generation
+        finally:
+            # The caller went away: stop generating and free the slot
+            generation.cancel()
+
+        message = {"role": "assistant", "content": "".join(content)}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        yield {"type": "message", "message": message}
+
+    async def _generate(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]], queue: asyncio.Queue):
+        """
+        Reads the Ollama stream into `queue` while holding a concurrency slot,
+        then puts None.
+        """
+        try:
+            async with self.slot():
+                with span("llm.chat", LLM_LATENCY, {"mode": "stream"}, model=self.model, messages=len(messages)) as trace:
+                    started = time.perf_counter()
+                    stream = await self.client.chat(
+                        model=self.model,
+                        messages=messages,
+                        tools=to_ollama_tools(tools),
+                        keep_alive=self.keep_alive,
+                        stream=True,
+                    )
+                    first = True
+                    async for chunk in stream:
+                        msg = chunk['message']
+                        if first and msg.get('content'):
+                            trace["first_token_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                            first = False
+                        await queue.put(msg)
+        except Exception as e:
+            print(f"Error calling Ollama: {e}")
+            raise e
+        finally:
+            await queue.put(None)
+
+    async def aclose(self):
+        """
+        Closes the pooled HTTP connections to Ollama.
+        """
+        await self.transport.aclose()
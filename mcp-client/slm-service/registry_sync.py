@@ -0,0 +1,72 @@
+import asyncio
+import os
+import httpx
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+REGISTRY_URL = os.environ.get("REGISTRY_URL", "http://localhost:8002/api/v1/servers")
+# Seconds between Registry polls for new/changed/removed tools (0 disables)
+REGISTRY_SYNC_INTERVAL = float(os.environ.get("REGISTRY_SYNC_INTERVAL", "30"))
+
+class RegistrySync:
+    """
+    Polls the Registry's server listing and hands changed listings to `apply`.
+    Uses If-None-Match so an unchanged poll is a bodiless 304 when the
+    Registry sends an ETag; otherwise `apply` is expected to diff cheaply.
+    The ETag is only kept once `apply` succeeds, so a listing that failed to
+    apply is fetched and applied again on the next poll.
+    """
+
+    def __init__(self, url: str, apply: Callable[[List[Dict[str, Any]]], Awaitable[None]], interval: float = 30):
+        self.url = url
+        self.apply = apply
+        self.interval = interval
+        self.etag: Optional[str] = None
+        # ETag of the last fetched listing, committed to `etag` once applied
+        self.fetched_etag: Optional[str] = None
+        self.client = httpx.AsyncClient(timeout=httpx.Timeout(10.0))
+        self.task: Optional[asyncio.Task] = None
+
+    async def fetch(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Returns the server listing, or None if it has not changed since the
+        last fetch.
+        """
+        headers = {"If-None-Match": self.etag} if self.etag else {}
+        resp = await self.client.get(self.url, headers=headers)
+        if resp.status_code == 304:
+            return None
+        resp.raise_for_status()
+        self.fetched_etag = resp.headers.get("ETag")
+        return resp.json()
+
+    async def sync_once(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fetches the listing and applies it if it changed. Returns the applied
+        listing, or None if it had not changed.
+        """
+        servers = await self.fetch()
+        if servers is None:
+            return None
+        await self.apply(servers)
+        self.etag = self.fetched_etag
+        return servers
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sync_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Registry sync failed: {e}")
+
+    def start(self):
+        if self.interval > 0:
+            self.task = asyncio.create_task(self.run())
+
+    async def aclose(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        await self.client.aclose()
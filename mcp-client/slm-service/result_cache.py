@@ -0,0 +1,137 @@
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from telemetry import RESULT_CACHE_EVENTS
+
+# The single-flight helper is shared with the WASM runtime, which this
+# service already runs from ../wasm-runtime (see runtimes.RUNTIME_SCRIPT)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "wasm-runtime"))
+from singleflight import SingleFlight
+
+# Bounds on the orchestrator-level tool result cache
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "4096"))
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# runtimeConfig key holding per-tool result TTLs, e.g.
+#   "runtimeConfig": {"resultCache": {"get_activity_recommendation": 3600}}
+# Tools that are not listed are never cached.
+RESULT_CACHE_CONFIG_KEY = "resultCache"
+
+def canonical_arguments(arguments: Dict[str, Any]) -> str:
+    return json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+def cache_policies(servers: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Collects tool name -> TTL (seconds) from the Registry listing.
+    """
+    policies: Dict[str, float] = {}
+    for server in servers:
+        config = (server.get('runtimeConfig') or {}).get(RESULT_CACHE_CONFIG_KEY) or {}
+        for tool, ttl in config.items():
+            try:
+                if float(ttl) > 0:
+                    policies[tool] = float(ttl)
+            except (TypeError, ValueError):
+                print(f"Ignoring invalid result cache TTL for {tool}: {ttl!r}")
+    return policies
+
+class ResultCache:
+    """
+    LRU cache of tool results keyed by tool name + canonical JSON arguments,
+    bounded by entry count and approximate size. Concurrent identical calls
+    share one execution.
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_MAX_ENTRIES, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policies: Dict[str, float] = {}
+        # key -> (expires_at, size, result)
+        self._data: "OrderedDict[Tuple[str, str], Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._inflight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0
+        self.evictions = 0
+
+    def set_policies(self, policies: Dict[str, float]):
+        """
+        Replaces the per-tool TTLs. Cached results are dropped because the
+        tools behind them may have changed.
+        """
+        self.policies = policies
+        self.clear()
+
+    def clear(self):
+        self._data.clear()
+        self._bytes = 0
+
+    async def call(self, name: str, arguments: Dict[str, Any], fn: Callable[[], Awaitable[Any]]) -> Any:
+        ttl = self.policies.get(name)
+        if not ttl:
+            return await fn()
+
+        key = (name, canonical_arguments(arguments))
+        item = self._data.get(key)
+        if item is not None:
+            if item[0] >= time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                RESULT_CACHE_EVENTS.labels(tool=name, result="hit").inc()
+                return item[2]
+            self._remove(key)
+
+        if key in self._inflight:
+            self.collapsed += 1
+            RESULT_CACHE_EVENTS.labels(tool=name, result="collapsed").inc()
+        else:
+            self.misses += 1
+            RESULT_CACHE_EVENTS.labels(tool=name, result="miss").inc()
+
+        async def execute():
+            result = await fn()
+            # Errors are returned to the caller but never cached
+            if not getattr(result, "isError", False):
+                self._store(key, ttl, result)
+            return result
+
+        return await self._inflight.do(key, execute)
+
+    def _store(self, key: Tuple[str, str], ttl: float, result: Any):
+        size = len(key[1]) + _result_size(result)
+        if size > self.max_bytes:
+            return
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (time.monotonic() + ttl, size, result)
+        self._bytes += size
+        while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+    def _remove(self, key: Tuple[str, str]):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "collapsed": self.collapsed,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "cacheable_tools": sorted(self.policies),
+        }
+
+def _result_size(result: Any) -> int:
+    if hasattr(result, "model_dump_json"):
+        return len(result.model_dump_json())
+    return len(json.dumps(result, default=str))
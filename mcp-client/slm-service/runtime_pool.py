@@ -0,0 +1,140 @@
+import asyncio
+import os
+import signal
+import sys
+import time
+from typing import Dict, List, Any, Optional
+
+from registry_sync import REGISTRY_SYNC_INTERVAL, REGISTRY_URL, RegistrySync
+from runtimes import (
+    RUNTIME_DRAIN_TIMEOUT,
+    RUNTIME_POOL_DIR,
+    RUNTIME_SCRIPT,
+    RuntimePlan,
+    plan_runtimes,
+    socket_path,
+)
+
+# Runs the WASM runtimes shared by every orchestrator worker, each serving MCP
+# on a Unix socket:
+#
+#   RUNTIME_POOL_DIR=/tmp/slm-runtimes python runtime_pool.py
+#   RUNTIME_POOL_DIR=/tmp/slm-runtimes uvicorn slm_server:app --workers 4
+#
+# Both sides follow the Registry and derive the same runtime names and socket
+# paths from it (runtimes.plan_runtimes / socket_path), so RUNTIME_MODE and
+# RUNTIME_REPLICAS must match.
+
+# Seconds a replaced or removed runtime keeps serving, so workers that have
+# not polled the Registry yet (and their in-flight calls) can move over
+RUNTIME_RETIRE_DELAY = float(
+    os.environ.get("RUNTIME_RETIRE_DELAY", str(REGISTRY_SYNC_INTERVAL + RUNTIME_DRAIN_TIMEOUT))
+)
+# Upper bound of the delay before respawning a runtime that exited (seconds)
+RUNTIME_RESPAWN_MAX_BACKOFF = float(os.environ.get("RUNTIME_RESPAWN_MAX_BACKOFF", "30"))
+
+class PooledRuntime:
+    """
+    One runtime process listening on its socket; respawned with exponential
+    backoff if it exits.
+    """
+
+    def __init__(self, name: str, plan: RuntimePlan):
+        self.name = name
+        self.plan = plan
+        self.path = socket_path(name, plan.key)
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        args = ["--socket", self.path]
+        for binary_url in self.plan.binary_urls:
+            args += ["--url", binary_url]
+
+        backoff = 1.0
+        while True:
+            # A stale socket would look like a live runtime to the workers
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            started = time.monotonic()
+            self.process = await asyncio.create_subprocess_exec(
+                RUNTIME_SCRIPT, *args, env={**os.environ, **self.plan.env}
+            )
+            print(f"Started {self.name} (pid {self.process.pid}) on {self.path}")
+            code = await self.process.wait()
+            if time.monotonic() - started > 60:
+                backoff = 1.0
+            print(f"Runtime {self.name} exited with code {code}; respawning in {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, RUNTIME_RESPAWN_MAX_BACKOFF)
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        if self.process is not None and self.process.returncode is None:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=10)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+pool: Dict[str, PooledRuntime] = {}
+retiring: Dict[PooledRuntime, asyncio.Task] = {}
+
+async def retire(runtime: PooledRuntime):
+    try:
+        await asyncio.sleep(RUNTIME_RETIRE_DELAY)
+    finally:
+        await runtime.stop()
+        retiring.pop(runtime, None)
+
+async def apply_registry(servers: List[Dict[str, Any]]):
+    plans = plan_runtimes(servers)
+    for name, runtime in list(pool.items()):
+        if name not in plans or plans[name].key != runtime.plan.key:
+            print(f"Retiring {name} in {RUNTIME_RETIRE_DELAY:.0f}s")
+            del pool[name]
+            retiring[runtime] = asyncio.create_task(retire(runtime))
+    for name, plan in plans.items():
+        if name not in pool:
+            pool[name] = PooledRuntime(name, plan)
+            pool[name].start()
+
+async def main():
+    if not RUNTIME_POOL_DIR:
+        sys.exit("Set RUNTIME_POOL_DIR to the directory the runtime sockets should live in.")
+    # Anyone who can reach the sockets can call the tools
+    os.makedirs(RUNTIME_POOL_DIR, mode=0o700, exist_ok=True)
+
+    registry = RegistrySync(REGISTRY_URL, apply_registry, interval=REGISTRY_SYNC_INTERVAL)
+    try:
+        await registry.sync_once()
+    except Exception as e:
+        print(f"Failed to fetch from Registry: {e}")
+    registry.start()
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    await stopping.wait()
+
+    print("Shutting down runtime pool...")
+    await registry.aclose()
+    for task in list(retiring.values()):
+        task.cancel()
+    await asyncio.gather(
+        *(runtime.stop() for runtime in pool.values()),
+        *retiring.values(),
+        return_exceptions=True,
+    )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,657 @@
+import anyio
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+import httpx
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, NamedTuple, Optional
+from mcp import ClientSession, StdioServerParameters
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+from admission import Limiter
+from circuit_breaker import CircuitBreaker
+from telemetry import (
+    CIRCUIT_STATE,
+    RUNTIME_LOAD_SECONDS,
+    RUNTIME_RESTARTS,
+    TOOL_LATENCY,
+    TOOL_QUEUE_WAIT,
+    request_id_var,
+    span,
+)
+from tool_catalog import ToolCatalog
+
+# Configuration
+# Path to the WASM Runtime script relative to this file
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RUNTIME_SCRIPT = os.environ.get("RUNTIME_SCRIPT", os.path.join(SCRIPT_DIR, "..", "wasm-runtime", "run.sh"))
+# "per-tool": one runtime process per registry entry (default)
+# "shared": a single runtime process hosts every registered binary
+RUNTIME_MODE = os.environ.get("RUNTIME_MODE", "per-tool")
+SHARED_RUNTIME_NAME = "wasm-runtime (shared)"
+# Runtime processes per registry entry (or per shared runtime); calls to a
+# tool go to the replica with the fewest calls in flight
+RUNTIME_REPLICAS = max(1, int(os.environ.get("RUNTIME_REPLICAS", "1")))
+# When set, runtimes are not spawned here: runtime_pool.py serves them on Unix
+# sockets in this directory and every orchestrator worker attaches to them
+RUNTIME_POOL_DIR = os.environ.get("RUNTIME_POOL_DIR", "")
+# Per-call deadline for a single tool invocation (seconds)
+TOOL_CALL_TIMEOUT = float(os.environ.get("TOOL_CALL_TIMEOUT", "30"))
+# Max concurrent tool calls in flight on one MCP session
+SESSION_MAX_FANOUT = int(os.environ.get("SESSION_MAX_FANOUT", "4"))
+# Max concurrent calls of one tool across its replicas; more wait (interactive
+# /chat calls first) for up to TOOL_QUEUE_TIMEOUT seconds, then get a 503
+TOOL_MAX_CONCURRENCY = int(os.environ.get("TOOL_MAX_CONCURRENCY", "32"))
+TOOL_QUEUE_TIMEOUT = float(os.environ.get("TOOL_QUEUE_TIMEOUT", "10"))
+# Max time a runtime gets to spawn, initialize and list its tools (seconds)
+RUNTIME_STARTUP_TIMEOUT = float(os.environ.get("RUNTIME_STARTUP_TIMEOUT", "60"))
+# Max time a replaced/removed runtime gets to finish in-flight calls (seconds)
+RUNTIME_DRAIN_TIMEOUT = float(os.environ.get("RUNTIME_DRAIN_TIMEOUT", "30"))
+# Health checks: a runtime is pinged every RUNTIME_PING_INTERVAL seconds and
+# restarted after RUNTIME_PING_FAILURES consecutive pings fail or time out
+RUNTIME_PING_INTERVAL = float(os.environ.get("RUNTIME_PING_INTERVAL", "5"))
+RUNTIME_PING_TIMEOUT = float(os.environ.get("RUNTIME_PING_TIMEOUT", "2"))
+RUNTIME_PING_FAILURES = int(os.environ.get("RUNTIME_PING_FAILURES", "2"))
+# Delay before respawning a dead runtime, doubled per failed attempt (seconds)
+RUNTIME_RESPAWN_BACKOFF = float(os.environ.get("RUNTIME_RESPAWN_BACKOFF", "1"))
+RUNTIME_RESPAWN_MAX_BACKOFF = float(os.environ.get("RUNTIME_RESPAWN_MAX_BACKOFF", "30"))
+
+# Max time a runtime gets to answer a runtime://stats read (seconds)
+RUNTIME_STATS_TIMEOUT = float(os.environ.get("RUNTIME_STATS_TIMEOUT", "2"))
+RUNTIME_STATS_URI = "runtime://stats"
+
+# runtimeConfig keys consumed by the orchestrator rather than the runtime
+ORCHESTRATOR_CONFIG_KEYS = {"resultCache"}
+
+# Global State
+mcp_tools: List[Dict[str, Any]] = []
+# Ready runtimes serving each tool (several with replicas or during a swap)
+tool_runtimes: Dict[str, List["RuntimeConnection"]] = {}
+# Active runtime per name (registry entry or SHARED_RUNTIME_NAME, plus
+# "#<n>" per replica)
+runtimes: Dict[str, "RuntimeConnection"] = {}
+# Runtime name -> key of the plan the running runtime was started from
+known_runtimes: Dict[str, str] = {}
+# Per-tool circuit breakers, created on first call
+breakers: Dict[str, CircuitBreaker] = {}
+# Per-tool concurrency tokens, created on first call
+tool_limiters: Dict[str, Limiter] = {}
+first_tools_ready = asyncio.Event()
+# Pre-converted snapshot of mcp_tools, rebuilt lazily after the tool set changes
+_catalog: Optional[ToolCatalog] = None
+
+class RuntimePlan(NamedTuple):
+    binary_urls: List[str]
+    env: Dict[str, str]
+    # Hash of everything the runtime was configured from; a new key means restart
+    key: str
+
+def socket_path(name: str, key: str) -> str:
+    """
+    Unix socket of a pooled runtime. Derived from the runtime name and plan
+    key so workers and runtime_pool.py agree without coordination, and short
+    enough for the ~100 byte socket path limit.
+    """
+    digest = hashlib.sha256(f"{name}\0{key}".encode()).hexdigest()[:16]
+    return os.path.join(RUNTIME_POOL_DIR, f"{digest}.sock")
+
+def uds_client_factory(path: str):
+    def create_client(headers=None, timeout=None, auth=None) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(uds=path),
+            headers=headers,
+            timeout=timeout,
+            auth=auth,
+            follow_redirects=True,
+        )
+    return create_client
+
+async def wait_for_socket(path: str):
+    while not os.path.exists(path):
+        await asyncio.sleep(0.1)
+
+def root_cause(error: BaseException) -> BaseException:
+    # The MCP transports wrap errors in (nested) exception groups
+    while getattr(error, "exceptions", None):
+        error = error.exceptions[0]
+    return error
+
+def is_transport_closed(error: BaseException) -> bool:
+    cause = root_cause(error)
+    # A request pending when the runtime's process died
+    if isinstance(cause, McpError) and cause.error.code == CONNECTION_CLOSED:
+        return True
+    return isinstance(cause, (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream))
+
+class ToolUnavailableError(Exception):
+    """
+    A call to a tool whose runtime is down and being respawned.
+    """
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Tool {name} is temporarily unavailable (runtime restarting, retry in {retry_after:.0f}s).")
+        self.name = name
+        self.retry_after = retry_after
+
+class RuntimeConnection:
+    """
+    One WASM Runtime process and the MCP session to it. The process is either
+    spawned here (stdio) or owned by runtime_pool.py (Unix socket).
+    """
+
+    def __init__(self, name: str, plan: RuntimePlan):
+        self.name = name
+        self.binary_urls = plan.binary_urls
+        self.env = plan.env
+        self.key = plan.key
+        # "starting" | "ready" | "restarting" | "failed" | "stopped"
+        self.status = "starting"
+        self.restarts = 0
+        self.stopping = False
+        # Set by a call that hit a closed transport, to health-check at once
+        self.check_now = asyncio.Event()
+        self.session: Optional[ClientSession] = None
+        self.tool_names: List[str] = []
+        # Tools of the last successful handshake; calls to them get a 503
+        # instead of a 404 while the runtime is respawned
+        self.offered_tools: List[str] = []
+        self.respawn_at = 0.0
+        self.semaphore = asyncio.Semaphore(SESSION_MAX_FANOUT)
+        self.inflight = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+        # Set once the handshake has either succeeded or failed
+        self.settled = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    @asynccontextmanager
+    async def transport(self):
+        if RUNTIME_POOL_DIR:
+            path = socket_path(self.name, self.key)
+            await asyncio.wait_for(wait_for_socket(path), timeout=RUNTIME_STARTUP_TIMEOUT)
+            async with streamablehttp_client(
+                "http://wasm-runtime/mcp/", httpx_client_factory=uds_client_factory(path)
+            ) as (read, write, _):
+                yield read, write
+            return
+
+        args = []
+        for binary_url in self.binary_urls:
+            args += ["--url", binary_url]
+
+        # Configure StdIO Transport
+        server_params = StdioServerParameters(
+            command=RUNTIME_SCRIPT,
+            args=args,
+            env={**os.environ, **self.env} # Pass current env + runtime config
+        )
+        async with stdio_client(server_params) as (read, write):
+            yield read, write
+
+    async def run(self):
+        """
+        Keeps the runtime connected until the task is cancelled: a runtime
+        that fails to start, dies or stops answering pings is respawned with
+        exponential backoff.
+        """
+        backoff = RUNTIME_RESPAWN_BACKOFF
+        while True:
+            started = time.monotonic()
+            await self.connect()
+            if self.stopping:
+                return
+            # A runtime that stayed up for a while starts over at the short delay
+            if time.monotonic() - started > RUNTIME_RESPAWN_MAX_BACKOFF * 2:
+                backoff = RUNTIME_RESPAWN_BACKOFF
+            self.status = "restarting"
+            self.restarts += 1
+            RUNTIME_RESTARTS.labels(runtime=self.name).inc()
+            print(f"Respawning {self.name} in {backoff:.1f}s (restart #{self.restarts})...")
+            self.respawn_at = time.monotonic() + backoff
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, RUNTIME_RESPAWN_MAX_BACKOFF)
+
+    async def connect(self):
+        """
+        Spawns (or attaches to) the runtime, registers its tools and holds the
+        connection open while it stays healthy.
+        """
+        print(f"Connecting to {self.name} via WASM Runtime...")
+
+        async def handshake(session: ClientSession):
+            await session.initialize()
+            return await session.list_tools()
+
+        try:
+            # The transport and session are entered and exited inside this task,
+            # as the anyio-based MCP client requires.
+            async with self.transport() as (read, write):
+                async with ClientSession(read, write) as session:
+                    self.session = session
+                    # A hanging binary gives up after the deadline instead of
+                    # blocking the other runtimes.
+                    result = await asyncio.wait_for(handshake(session), timeout=RUNTIME_STARTUP_TIMEOUT)
+                    print('All available tools to slm server',result)
+                    register_tools(self, result.tools)
+                    self.offered_tools = list(self.tool_names)
+                    self.status = "ready"
+                    self.settled.set()
+                    if self.tool_names:
+                        first_tools_ready.set()
+                    print(f"Connected to {self.name}. Tools: {self.tool_names}")
+                    await self.record_load_times()
+
+                    # Keep the connection alive while the runtime answers pings
+                    await self.monitor(session)
+
+        except asyncio.CancelledError:
+            self.status = "stopped"
+            raise
+        except asyncio.TimeoutError:
+            self.status = "failed"
+            print(f"Failed to connect to {self.name}: no response within {RUNTIME_STARTUP_TIMEOUT}s")
+        except Exception as e:
+            self.status = "failed"
+            print(f"Failed to connect to {self.name}: {root_cause(e)!r}")
+        finally:
+            self.settled.set()
+            unregister_tools(self)
+            self.tool_names = []
+            self.session = None
+
+    async def monitor(self, session: ClientSession):
+        """
+        Returns by raising once the runtime misses RUNTIME_PING_FAILURES pings
+        in a row (a crashed process fails them at once, a hung one times out).
+        """
+        failures = 0
+        while True:
+            try:
+                await asyncio.wait_for(self.check_now.wait(), timeout=RUNTIME_PING_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.check_now.clear()
+            try:
+                await asyncio.wait_for(session.send_ping(), timeout=RUNTIME_PING_TIMEOUT)
+                failures = 0
+            except Exception as e:
+                failures += 1
+                print(f"Ping to {self.name} failed ({failures}/{RUNTIME_PING_FAILURES}): {root_cause(e)!r}")
+                # A closed transport never recovers; no point in pinging again
+                if failures >= RUNTIME_PING_FAILURES or is_transport_closed(e):
+                    raise RuntimeError(f"runtime unresponsive after {failures} failed ping(s)")
+
+    async def read_stats(self) -> Dict[str, Any]:
+        """
+        Reads the runtime's own counters (load timings, upstream caches).
+        """
+        result = await asyncio.wait_for(
+            self.session.read_resource(RUNTIME_STATS_URI), timeout=RUNTIME_STATS_TIMEOUT
+        )
+        return json.loads(result.contents[0].text)
+
+    async def record_load_times(self):
+        """
+        Observes how long the runtime took to load each tool, by phase.
+        """
+        try:
+            stats = await self.read_stats()
+        except Exception as e:
+            print(f"Could not read load timings of {self.name}: {root_cause(e)!r}")
+            return
+        for tool, phases in (stats.get("load_seconds") or {}).items():
+            for phase, seconds in phases.items():
+                RUNTIME_LOAD_SECONDS.labels(runtime=self.name, tool=tool, phase=phase).observe(seconds)
+
+    def retry_after(self) -> float:
+        # Respawning takes at least a second once the backoff is over
+        return max(1.0, self.respawn_at - time.monotonic() + 1)
+
+    async def wait_ready(self) -> bool:
+        await self.settled.wait()
+        return self.status == "ready"
+
+    async def stop(self, drain_timeout: float = 0):
+        """
+        Stops routing new calls here, lets in-flight calls finish (up to
+        drain_timeout) and then shuts the runtime down.
+        """
+        self.stopping = True
+        unregister_tools(self)
+        if drain_timeout and self.inflight:
+            print(f"Draining {self.inflight} in-flight call(s) on {self.name}...")
+            try:
+                await asyncio.wait_for(self.idle.wait(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                print(f"Drain timeout on {self.name}; closing with {self.inflight} call(s) in flight.")
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+def tool_catalog() -> ToolCatalog:
+    global _catalog
+    if _catalog is None:
+        _catalog = ToolCatalog(mcp_tools)
+    return _catalog
+
+def register_tools(runtime: RuntimeConnection, tools: List[Any]):
+    global _catalog
+    for tool in tools:
+        # We namespace tools to avoid collisions? Or just aggregate
+        # For now, simple aggregation.
+        # Note: MCP Tool object needs to be converted dict for our usage
+        tool_def = {
+            "name": tool.name,
+            "description": tool.description,
+            "inputSchema": tool.inputSchema
+        }
+        # The newest runtime's definition wins (e.g. a replacement's)
+        mcp_tools[:] = [t for t in mcp_tools if t["name"] != tool.name]
+        mcp_tools.append(tool_def)
+        tool_runtimes.setdefault(tool.name, []).append(runtime)
+        runtime.tool_names.append(tool.name)
+    _catalog = None
+
+def unregister_tools(runtime: RuntimeConnection):
+    global _catalog
+    for name in runtime.tool_names:
+        replicas = [r for r in tool_runtimes.get(name, []) if r is not runtime]
+        if replicas:
+            tool_runtimes[name] = replicas
+        else:
+            tool_runtimes.pop(name, None)
+    mcp_tools[:] = [t for t in mcp_tools if t["name"] in tool_runtimes]
+    _catalog = None
+
+def pick_runtime(name: str) -> Optional[RuntimeConnection]:
+    """
+    The replica serving `name` with the fewest calls in flight (ties broken
+    at random), or None if no runtime serves it.
+    """
+    replicas = tool_runtimes.get(name)
+    if not replicas:
+        return None
+    if len(replicas) == 1:
+        return replicas[0]
+    least = min(r.inflight for r in replicas)
+    return random.choice([r for r in replicas if r.inflight == least])
+
+def missing_tool_error(name: str) -> Exception:
+    """
+    Why no runtime serves `name`: ToolUnavailableError while the runtime
+    that served it is being respawned, LookupError otherwise.
+    """
+    for runtime in runtimes.values():
+        if name in runtime.offered_tools and runtime.status != "ready" and not runtime.stopping:
+            return ToolUnavailableError(name, runtime.retry_after())
+    return LookupError(f"Tool {name} is not available.")
+
+async def invoke_tool(name: str, arguments: Dict[str, Any]):
+    """
+    Calls a tool on its least-loaded runtime under the tool's concurrency
+    token, that runtime's fan-out limit and the per-call deadline. Tracks
+    in-flight calls so the runtime can be drained.
+    """
+    if pick_runtime(name) is None:
+        raise missing_tool_error(name)
+    # An unhealthy tool fails here at once instead of holding the request up
+    breaker = breakers.get(name)
+    if breaker is None:
+        breaker = breakers[name] = CircuitBreaker(name)
+    breaker.before_call()
+
+    limiter = tool_limiters.get(name)
+    if limiter is None:
+        limiter = tool_limiters[name] = Limiter(f"tool:{name}", TOOL_MAX_CONCURRENCY, timeout=TOOL_QUEUE_TIMEOUT)
+    try:
+        await limiter.acquire()
+    except BaseException:
+        # Rejected or cancelled before reaching the tool: says nothing about its health
+        breaker.record_cancelled()
+        raise
+    try:
+        return await call_runtime(name, arguments, breaker)
+    finally:
+        limiter.release()
+
+async def call_runtime(name: str, arguments: Dict[str, Any], breaker: CircuitBreaker):
+    # Picked after waiting for the token, so the load figures are current
+    runtime = pick_runtime(name)
+    if runtime is None:
+        breaker.record_cancelled()
+        raise missing_tool_error(name)
+    session = runtime.session
+    # The request ID rides along in MCP _meta so runtime trace lines match ours
+    meta = {"requestId": request_id_var.get()} if request_id_var.get() else None
+
+    async def call():
+        queued = time.perf_counter()
+        async with runtime.semaphore:
+            TOOL_QUEUE_WAIT.labels(tool=name).observe(time.perf_counter() - queued)
+            with span("tool.call", TOOL_LATENCY, {"tool": name}, runtime=runtime.name):
+                return await session.call_tool(name, arguments=arguments, meta=meta)
+
+    runtime.inflight += 1
+    runtime.idle.clear()
+    try:
+        # The deadline covers waiting for a fan-out slot as well as the call
+        result = await asyncio.wait_for(call(), timeout=TOOL_CALL_TIMEOUT)
+    except asyncio.CancelledError:
+        breaker.record_cancelled()
+        raise
+    except Exception as e:
+        # Timeouts and broken sessions; tool errors come back as isError results
+        breaker.record_failure()
+        if is_transport_closed(e):
+            # The runtime died under the call; the supervisor respawns it
+            runtime.check_now.set()
+            raise ToolUnavailableError(name, runtime.retry_after()) from e
+        raise
+    else:
+        breaker.record_success()
+        return result
+    finally:
+        CIRCUIT_STATE.labels(tool=name).set(CIRCUIT_STATES[breaker.state])
+        runtime.inflight -= 1
+        if runtime.inflight == 0:
+            runtime.idle.set()
+
+def start_runtime(name: str, plan: RuntimePlan) -> RuntimeConnection:
+    runtime = RuntimeConnection(name, plan)
+    runtime.start()
+    runtimes[name] = runtime
+    return runtime
+
+async def replace_runtime(name: str, plan: RuntimePlan) -> bool:
+    """
+    Starts a new runtime next to the old one and swaps over once it is ready.
+    The old runtime keeps serving if the new one fails to come up. Returns
+    whether the swap happened.
+    """
+    old = runtimes.get(name)
+    new = RuntimeConnection(name, plan)
+    new.start()
+    if await new.wait_ready():
+        runtimes[name] = new
+        if old is not None:
+            await old.stop(drain_timeout=RUNTIME_DRAIN_TIMEOUT)
+        print(f"Replaced runtime {name}.")
+        return True
+    # Do not leave the failed replacement retrying in the background
+    await new.stop()
+    print(f"Replacement for {name} failed; keeping the running version.")
+    return False
+
+async def stop_runtime(name: str, drain_timeout: float = 0):
+    runtime = runtimes.pop(name, None)
+    if runtime is not None:
+        await runtime.stop(drain_timeout=drain_timeout)
+
+async def stop_all_runtimes():
+    await asyncio.gather(*(stop_runtime(name) for name in list(runtimes)))
+
+async def collect_runtime_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Stats of every ready runtime; runtimes that fail to answer are skipped.
+    """
+    ready = [rt for rt in runtimes.values() if rt.status == "ready"]
+    results = await asyncio.gather(*(rt.read_stats() for rt in ready), return_exceptions=True)
+    stats = {}
+    for rt, result in zip(ready, results):
+        if isinstance(result, BaseException):
+            print(f"Failed to read stats from {rt.name}: {result!r}")
+        else:
+            stats[rt.name] = result
+    return stats
+
+def runtime_status() -> Dict[str, str]:
+    return {name: runtime.status for name, runtime in runtimes.items()}
+
+# Gauge values of the circuit states
+CIRCUIT_STATES = {"closed": 0, "half-open": 1, "open": 2}
+
+def circuit_status() -> Dict[str, str]:
+    """
+    Tools whose circuit breaker is not closed.
+    """
+    return {name: breaker.state for name, breaker in breakers.items() if breaker.state != "closed"}
+
+async def wait_for_first_tools():
+    """
+    Returns once any runtime has registered tools, or every runtime has given up.
+    """
+    ready = asyncio.ensure_future(first_tools_ready.wait())
+    pending = {asyncio.ensure_future(runtime.settled.wait()) for runtime in runtimes.values()}
+    try:
+        while pending and not ready.done():
+            _, pending = await asyncio.wait(pending | {ready}, return_when=asyncio.FIRST_COMPLETED)
+            pending.discard(ready)
+    finally:
+        ready.cancel()
+        for waiter in pending:
+            waiter.cancel()
+
+def runtime_env(server: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Environment for a runtime from its runtimeConfig. Orchestrator-only
+    settings (e.g. resultCache) are not passed on.
+    """
+    config = server.get('runtimeConfig') or {}
+    return {
+        key: value if isinstance(value, str) else json.dumps(value)
+        for key, value in config.items()
+        if key not in ORCHESTRATOR_CONFIG_KEYS
+    }
+
+def server_spec(server: Dict[str, Any]) -> tuple:
+    """
+    What a runtime is started from. Orchestrator-only settings and updatedAt
+    are left out, so changing e.g. resultCache does not restart the runtime;
+    a republished binary gets a new (content-addressed) binaryUrl.
+    """
+    return (
+        server['binaryUrl'],
+        server.get('version'),
+        json.dumps(runtime_env(server), sort_keys=True),
+    )
+
+def plan_key(specs: List[tuple]) -> str:
+    return hashlib.sha256(json.dumps(specs).encode()).hexdigest()
+
+def shared_runtime_name(index: int) -> str:
+    # Extra shared runtimes, only needed on conflicting runtimeConfig
+    return SHARED_RUNTIME_NAME if index == 0 else f"wasm-runtime (shared {index + 1})"
+
+def shared_groups(servers: List[Dict[str, Any]]) -> List[tuple]:
+    """
+    Groups servers into as few shared runtimes as possible. A process has one
+    environment, so servers whose runtimeConfig sets the same key to
+    different values cannot share one and go to separate runtimes.
+    """
+    groups: List[tuple] = []
+    for server in servers:
+        server_env = runtime_env(server)
+        for env, members in groups:
+            if all(env.get(key, value) == value for key, value in server_env.items()):
+                env.update(server_env)
+                members.append(server)
+                break
+        else:
+            if groups:
+                print(f"{server['name']}: runtimeConfig conflicts with the shared runtime; "
+                      f"hosting it in {shared_runtime_name(len(groups))}")
+            groups.append((dict(server_env), [server]))
+    return groups
+
+def plan_runtimes(servers: List[Dict[str, Any]]) -> Dict[str, RuntimePlan]:
+    """
+    The runtimes a registry listing calls for, by name. Shared by the
+    orchestrator and runtime_pool.py so both derive the same names and keys.
+    """
+    if RUNTIME_MODE == "shared":
+        # One runtime process hosts every binary on a single Engine; it routes
+        # calls by tool name, so all tools share one MCP session.
+        groups = [
+            (shared_runtime_name(index), [s['binaryUrl'] for s in members], env, [server_spec(s) for s in members])
+            for index, (env, members) in enumerate(shared_groups(servers))
+        ]
+    else:
+        groups = [
+            (server['name'], [server['binaryUrl']], runtime_env(server), [server_spec(server)])
+            for server in servers
+        ]
+
+    plans = {}
+    for name, binary_urls, env, specs in groups:
+        plan = RuntimePlan(binary_urls, env, plan_key(specs))
+        if RUNTIME_REPLICAS == 1:
+            plans[name] = plan
+        else:
+            for replica in range(1, RUNTIME_REPLICAS + 1):
+                plans[f"{name}#{replica}"] = plan
+    return plans
+
+async def sync_runtimes(servers: List[Dict[str, Any]]) -> bool:
+    """
+    Brings the running runtimes in line with a registry listing: starts new
+    ones, replaces changed ones and stops removed ones. Unchanged runtimes
+    are left alone. Returns whether anything changed; raises if a runtime
+    could not be replaced, which is then retried with the next listing.
+    """
+    plans = plan_runtimes(servers)
+    added = [name for name in plans if name not in known_runtimes]
+    removed = [name for name in known_runtimes if name not in plans]
+    changed = [name for name in plans if name in known_runtimes and known_runtimes[name] != plans[name].key]
+    if not (added or removed or changed):
+        return False
+
+    print(f"Registry changes: added={added} changed={changed} removed={removed}")
+    for name in added:
+        # New runtimes keep retrying on their own, so they count as applied
+        start_runtime(name, plans[name])
+        known_runtimes[name] = plans[name].key
+    replaced, _ = await asyncio.gather(
+        asyncio.gather(*(replace_runtime(name, plans[name]) for name in changed)),
+        asyncio.gather(*(stop_runtime(name, drain_timeout=RUNTIME_DRAIN_TIMEOUT) for name in removed)),
+    )
+    for name in removed:
+        known_runtimes.pop(name, None)
+    # A runtime is only recorded as up to date once its replacement is serving
+    failed = []
+    for name, ok in zip(changed, replaced):
+        if ok:
+            known_runtimes[name] = plans[name].key
+        else:
+            failed.append(name)
+    if failed:
+        raise RuntimeError(f"Runtimes still on their previous version: {failed}")
+    return True
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+# Conversations kept in memory; the least recently used one is dropped beyond this
+CONVERSATION_MAX_SESSIONS = int(os.environ.get("CONVERSATION_MAX_SESSIONS", "1024"))
+# Seconds an idle conversation is kept
+CONVERSATION_TTL = float(os.environ.get("CONVERSATION_TTL", "1800"))
+# Approximate tokens of history sent to the model (system prompt and tools not included)
+CONVERSATION_TOKEN_BUDGET = int(os.environ.get("CONVERSATION_TOKEN_BUDGET", "4096"))
+# Once over budget, history is cut down to this fraction of it, so the prompt
+# prefix then stays the same for several turns instead of shifting every turn
+CONVERSATION_TRIM_TARGET = float(os.environ.get("CONVERSATION_TRIM_TARGET", "0.6"))
+# Rough characters per token of serialized messages
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(message: Any) -> int:
+    # Ollama messages are pydantic models
+    if hasattr(message, "model_dump"):
+        message = message.model_dump(exclude_none=True)
+    return len(json.dumps(message, default=str)) // CHARS_PER_TOKEN + 1
+
+def tool_names(tools: List[Dict[str, Any]]) -> List[str]:
+    return [tool["function"]["name"] for tool in tools]
+
+def trim_history(messages: List[Any], budget: int = CONVERSATION_TOKEN_BUDGET,
+                 target: float = CONVERSATION_TRIM_TARGET) -> List[Any]:
+    """
+    Drops the oldest turns once the history exceeds `budget` tokens, until it
+    fits `target * budget`. The history always starts at a user message, so
+    an assistant's tool calls stay together with their results, and the
+    latest turn is never dropped.
+    """
+    sizes = [estimate_tokens(m) for m in messages]
+    total = sum(sizes)
+    if total <= budget:
+        return messages
+    start = 0
+    while total > budget * target:
+        next_turn = next((i for i in range(start + 1, len(messages)) if messages[i].get("role") == "user"), None)
+        if next_turn is None:
+            break
+        total -= sum(sizes[start:next_turn])
+        start = next_turn
+    return messages[start:]
+
+class Conversation:
+    """
+    Server-side history of one chat session. `lock` serializes its turns.
+    """
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.messages: List[Any] = []
+        # Tools offered to the model, pinned so the prompt prefix stays byte-identical
+        self.tools: List[Dict[str, Any]] = []
+        self.trimmed = 0
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+    def pin_tools(self, selected: List[Dict[str, Any]], available: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Returns the tools to offer this turn: the ones offered before, in the
+        order they were first offered, followed by any newly selected. The
+        list only grows at its end when a new tool becomes relevant, even if
+        the catalog is reordered (an unpublished tool is dropped).
+        """
+        current = {tool["function"]["name"]: tool for tool in available}
+        tools = [current[name] for name in tool_names(self.tools) if name in current]
+        offered = set(tool_names(tools))
+        for name in tool_names(selected):
+            if name in current and name not in offered:
+                tools.append(current[name])
+                offered.add(name)
+        self.tools = tools
+        return self.tools
+
+    def commit(self, messages: List[Any]):
+        """
+        Stores the history after a completed turn, trimmed to the token budget.
+        """
+        trimmed = trim_history(messages)
+        self.trimmed += len(messages) - len(trimmed)
+        self.messages = trimmed
+
+class ConversationStore:
+    """
+    In-memory LRU of conversations; idle ones expire after `ttl` seconds.
+    """
+
+    def __init__(self, max_sessions: int = CONVERSATION_MAX_SESSIONS, ttl: float = CONVERSATION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        # Ordered from least to most recently used
+        self._data: "OrderedDict[str, Conversation]" = OrderedDict()
+        self.expired = 0
+        self.evicted = 0
+
+    def create(self) -> Conversation:
+        self._expire()
+        while len(self._data) >= self.max_sessions:
+            self._data.popitem(last=False)
+            self.evicted += 1
+        conversation = Conversation(uuid.uuid4().hex)
+        self._data[conversation.id] = conversation
+        return conversation
+
+    def get(self, session_id: str) -> Optional[Conversation]:
+        self._expire()
+        conversation = self._data.get(session_id)
+        if conversation is not None:
+            conversation.last_used = time.monotonic()
+            self._data.move_to_end(session_id)
+        return conversation
+
+    def delete(self, session_id: str) -> bool:
+        return self._data.pop(session_id, None) is not None
+
+    def _expire(self):
+        deadline = time.monotonic() - self.ttl
+        while self._data:
+            oldest = next(iter(self._data.values()))
+            if oldest.last_used >= deadline:
+                break
+            self._data.popitem(last=False)
+            self.expired += 1
+
+    def stats(self) -> Dict[str, Any]:
+        self._expire()
+        return {
+            "sessions": len(self._data),
+            "max_sessions": self.max_sessions,
+            "ttl": self.ttl,
+            "token_budget": CONVERSATION_TOKEN_BUDGET,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
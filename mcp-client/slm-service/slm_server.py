@@ -1,87 +1,89 @@
 import asyncio
+import json
 import os
-import httpx
-from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+import time
+from contextlib import asynccontextmanager, nullcontext
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from typing import List, Dict, Any, Optional, AsyncIterator
 
+from admission import Overloaded, admission, admit, set_priority
+from circuit_breaker import CircuitOpenError
 from llm_client import LLMClient
+from registry_sync import REGISTRY_SYNC_INTERVAL, REGISTRY_URL, RegistrySync
+from result_cache import ResultCache, cache_policies, canonical_arguments
+from sessions import Conversation, ConversationStore
+from telemetry import (
+    HTTP_LATENCY,
+    RUNTIME_UPSTREAM_CACHE,
+    log_event,
+    new_request_id,
+)
+from runtimes import (
+    mcp_tools,
+    tool_runtimes,
+    TOOL_CALL_TIMEOUT,
+    ToolUnavailableError,
+    circuit_status,
+    collect_runtime_stats,
+    invoke_tool,
+    missing_tool_error,
+    runtime_status,
+    stop_all_runtimes,
+    sync_runtimes,
+    tool_catalog,
+    tool_limiters,
+    wait_for_first_tools,
+)
+
+# Memoized tool results, per-tool TTLs come from runtimeConfig.resultCache
+result_cache = ResultCache()
 
-# Configuration
-REGISTRY_URL = "http://localhost:8002/api/v1/servers"
-# Path to the WASM Runtime script relative to this file
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-RUNTIME_SCRIPT = os.path.join(SCRIPT_DIR, "..", "wasm-runtime", "run.sh")
+# Server-side chat histories, see /sessions
+conversations = ConversationStore()
 
-# Global State
-mcp_sessions: Dict[str, ClientSession] = {}
-mcp_tools: List[Dict[str, Any]] = []
-exit_stack = None
+# Max calls accepted in one /call/batch request
+BATCH_MAX_CALLS = int(os.environ.get("BATCH_MAX_CALLS", "1000"))
+# Calls of one batch in flight at once (a request may ask for fewer)
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "16"))
+
+async def apply_registry(servers: List[Dict[str, Any]]):
+    policies = cache_policies(servers)
+    # resultCache is not part of a runtime's plan, so a change to it alone
+    # restarts nothing but still has to reach the cache
+    if await sync_runtimes(servers) or policies != result_cache.policies:
+        result_cache.set_policies(policies)
+
+async def call_tool_cached(name: str, arguments: Dict[str, Any]):
+    return await result_cache.call(name, arguments, lambda: invoke_tool(name, arguments))
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global mcp_tools, exit_stack
     print("SLM Service Starting...")
+    registry = RegistrySync(REGISTRY_URL, apply_registry, interval=REGISTRY_SYNC_INTERVAL)
     
-    # 1. Fetch available tools from Registry
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.get(REGISTRY_URL)
-            servers = resp.json()
-        except Exception as e:
-            print(f"Failed to fetch from Registry: {e}")
-            servers = []
+    # 1. Fetch available tools from Registry and 2. connect to each tool via
+    # WASM Runtime, all runtimes concurrently. We maintain persistent
+    # connections for the life of the server
+    try:
+        servers = await registry.sync_once() or []
+    except Exception as e:
+        print(f"Failed to fetch from Registry: {e}")
+        servers = []
 
     print(f"Found {len(servers)} servers in Registry.")
 
-    # 2. Connect to each tool via WASM Runtime
-    # We maintain persistent connections for the life of the server
-    from contextlib import AsyncExitStack
-    exit_stack = AsyncExitStack()
-    
-    for server in servers:
-        name = server['name']
-        binary_url = server['binaryUrl']
-        env = server.get('runtimeConfig', {})
-        
-        print(f"Connecting to {name} via WASM Runtime...")
-        
-        # Configure StdIO Transport
-        server_params = StdioServerParameters(
-            command=RUNTIME_SCRIPT,
-            args=["--url", binary_url],
-            env={**os.environ, **env} # Pass current env + runtime config
-        )
-        
-        try:
-            # Establish connection
-            read, write = await exit_stack.enter_async_context(stdio_client(server_params))
-            session = await exit_stack.enter_async_context(ClientSession(read, write))
-            await session.initialize()
-            
-            # List tools
-            result = await session.list_tools()
-            print('All available tools to slm server',result)
-            for tool in result.tools:
-                # We namespace tools to avoid collisions? Or just aggregate
-                # For now, simple aggregation.
-                # Note: MCP Tool object needs to be converted dict for our usage
-                tool_def = {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "inputSchema": tool.inputSchema
-                }
-                mcp_tools.append(tool_def)
-                mcp_sessions[tool.name] = session # Map tool name to session
-                
-            print(f"Connected to {name}. Tools: {[t.name for t in result.tools]}")
-            
-        except Exception as e:
-            print(f"Failed to connect to {name}: {e}")
+    # Start serving as soon as the first tools are up; slower runtimes keep
+    # registering their tools in the background (see /ready).
+    await wait_for_first_tools()
+
+    # 3. Keep following the Registry so published tools show up without a restart
+    registry.start()
 
     print("--------------------------------------------------")
     print(f"SLM Service Startup Complete.")
@@ -92,7 +94,9 @@ async def lifespan(app: FastAPI):
     
     # Cleanup
     print("Shutting down...")
-    await exit_stack.aclose()
+    await registry.aclose()
+    await stop_all_runtimes()
+    await llm.aclose()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -104,103 +108,413 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Tags the request with an ID (the caller's X-Request-ID, or a new one)
+    that follows it through LLM turns and tool calls, and records latency.
+    """
+    request_id = new_request_id(request.headers.get("X-Request-ID"))
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Route templates keep the label set bounded
+    route = request.scope.get("route")
+    latency = HTTP_LATENCY.labels(path=getattr(route, "path", "unmatched"), status=str(response.status_code))
+
+    async def timed_body(body):
+        # call_next returns once the headers are ready; streamed responses
+        # (/chat/stream, /call/batch) are only done once the body is sent
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            latency.observe(time.perf_counter() - started)
+
+    response.body_iterator = timed_body(response.body_iterator)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+@app.exception_handler(Overloaded)
+async def overloaded(request: Request, exc: Overloaded):
+    # Admission queue full (429) or queue deadline passed (503)
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
+
 llm = LLMClient()
 
 class ChatRequest(BaseModel):
     messages: List[Dict[str, Any]]
+    # With a session, `messages` holds only the new message(s)
+    session_id: Optional[str] = None
 
 class CallRequest(BaseModel):
     name: str
     arguments: Dict[str, Any]
 
+class BatchCallRequest(BaseModel):
+    calls: List[CallRequest]
+    concurrency: Optional[int] = None
+
+@app.get("/ready")
+async def ready():
+    """
+    Readiness of the tool runtimes. Returns 503 until at least one tool is usable.
+    """
+    statuses = set(runtime_status().values())
+    if "starting" in statuses:
+        status = "starting"
+    elif not statuses:
+        status = "no_runtimes"
+    elif not mcp_tools:
+        status = "not_ready"
+    elif statuses - {"ready"}:
+        status = "degraded"
+    else:
+        status = "ready"
+    body = {
+        "status": status,
+        "tools": [t["name"] for t in mcp_tools],
+        "runtimes": runtime_status(),
+        "open_circuits": circuit_status(),
+    }
+    return JSONResponse(status_code=200 if mcp_tools else 503, content=body)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return result_cache.stats()
+
+@app.get("/admission/stats")
+async def admission_stats():
+    """
+    Slots in use and queue depth per front-door queue, the LLM and each tool.
+    """
+    limiters = {**admission, "llm": llm.limiter, **{l.name: l for l in tool_limiters.values()}}
+    return {name: limiter.stats() for name, limiter in limiters.items()}
+
+@app.post("/sessions")
+async def create_session():
+    """
+    Starts a server-side conversation. Pass the returned session_id to /chat
+    (or /chat/stream) and send only the new message each turn.
+    """
+    conversation = conversations.create()
+    return {"session_id": conversation.id, "ttl": conversations.ttl}
+
+@app.get("/sessions/stats")
+async def session_stats():
+    return conversations.stats()
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    if not conversations.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found or expired.")
+    return Response(status_code=204)
+
+def find_conversation(session_id: Optional[str]) -> Optional[Conversation]:
+    if session_id is None:
+        return None
+    conversation = conversations.get(session_id)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found or expired.")
+    return conversation
+
+def turn_lock(conversation: Optional[Conversation]):
+    # Turns of one conversation run one at a time so their histories do not interleave
+    return conversation.lock if conversation is not None else nullcontext()
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics. Runtime-side counters are pulled from each runtime's
+    runtime://stats resource at scrape time.
+    """
+    for name, stats in (await collect_runtime_stats()).items():
+        for tier, cache in ((stats.get("upstream") or {}).get("caches") or {}).items():
+            for counter in ("size", "hits", "misses"):
+                RUNTIME_UPSTREAM_CACHE.labels(runtime=name, tier=tier, counter=counter).set(cache.get(counter, 0))
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Several uvicorn workers: aggregate every worker's samples
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+def tool_call_error(name: str, e: Exception) -> HTTPException:
+    """
+    Maps a failed direct tool call to the HTTP error /call responds with.
+    """
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, asyncio.TimeoutError):
+        print(f"Direct tool execution timed out: {name}")
+        return HTTPException(status_code=504, detail=f"Tool {name} timed out after {TOOL_CALL_TIMEOUT}s.")
+    if isinstance(e, Overloaded):
+        return HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(max(1, round(e.retry_after)))})
+    if isinstance(e, (CircuitOpenError, ToolUnavailableError)):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(max(1, round(e.retry_after)))})
+    if isinstance(e, LookupError):
+        return HTTPException(status_code=404, detail=str(e))
+    print(f"Direct tool execution failed: {e!r}")
+    return HTTPException(status_code=500, detail=str(e) or repr(e))
+
+async def call_tool_direct_once(name: str, arguments: Dict[str, Any]):
+    if name not in tool_runtimes:
+        error = missing_tool_error(name)
+        if isinstance(error, LookupError):
+            raise HTTPException(status_code=404, detail=f"Tool {name} not found or not connected.")
+        raise error
+    # Execute Tool via MCP
+    return await call_tool_cached(name, arguments)
+
 @app.post("/call")
 async def call_tool_direct(request: CallRequest):
     print(f"Direct call requested for tool: {request.name} with args: {request.arguments}")
-    session = mcp_sessions.get(request.name)
-    if not session:
-        raise HTTPException(status_code=404, detail=f"Tool {request.name} not found or not connected.")
-    
     try:
-        # Execute Tool via MCP
-        result = await session.call_tool(request.name, arguments=request.arguments)
-        return result
+        async with admit("call"):
+            return await call_tool_direct_once(request.name, request.arguments)
     except Exception as e:
-        print(f"Direct tool execution failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise tool_call_error(request.name, e)
+
+@app.post("/call/batch")
+async def call_tool_batch(request: BatchCallRequest):
+    """
+    Runs many direct tool calls concurrently (at most `concurrency` at once)
+    and streams newline-delimited JSON as each finishes: one "result" event
+    per call, in completion order and tagged with its index, then "done".
+    Identical calls (same tool and arguments) are executed once.
+    """
+    if not request.calls:
+        raise HTTPException(status_code=400, detail="No calls given.")
+    if len(request.calls) > BATCH_MAX_CALLS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_CALLS} calls per batch.")
+    concurrency = max(1, min(request.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY))
+
+    # (name, canonical arguments) -> indexes of the calls that asked for it
+    unique: Dict[tuple, List[int]] = {}
+    for index, call in enumerate(request.calls):
+        unique.setdefault((call.name, canonical_arguments(call.arguments)), []).append(index)
+    print(f"Batch call requested: {len(request.calls)} calls, {len(unique)} unique, concurrency {concurrency}")
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(indexes: List[int]):
+        call = request.calls[indexes[0]]
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                async with admit("call"):
+                    result = await call_tool_direct_once(call.name, call.arguments)
+                outcome = {"status": 200, "result": jsonable_encoder(result)}
+            except Exception as e:
+                error = tool_call_error(call.name, e)
+                outcome = {"status": error.status_code, "detail": error.detail}
+        return indexes, call.name, outcome, (time.perf_counter() - started) * 1000
+
+    async def ndjson():
+        tasks = [asyncio.create_task(run(indexes)) for indexes in unique.values()]
+        failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                indexes, name, outcome, duration_ms = await next_done
+                for index in indexes:
+                    if outcome["status"] != 200:
+                        failed += 1
+                    event = {"type": "result", "index": index, "name": name,
+                             "duration_ms": round(duration_ms, 1), **outcome}
+                    yield json.dumps(event) + "\n"
+            log_event("call.batch", calls=len(request.calls), unique=len(unique), failed=failed)
+            yield json.dumps({"type": "done", "calls": len(request.calls), "unique": len(unique), "failed": failed}) + "\n"
+        finally:
+            # Client went away: do not keep running the rest of the batch
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+async def execute_tool_call(tool_call: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs one LLM-requested tool call and returns its 'tool' role message.
+    Errors and timeouts are reported in the message instead of raised, so one
+    failing call never cancels its siblings.
+    """
+    fn = tool_call['function']
+    name = fn['name']
+    args = fn['arguments']
+
+    print(f"Executing tool: {name} with args: {args}")
+
+    if name not in tool_runtimes:
+        return {"role": "tool", "content": f"Error: Tool {name} not found.", "tool_call_id": tool_call.get('id')}
+
+    try:
+        result = await call_tool_cached(name, args)
+        tool_output = "".join([c.text for c in result.content if c.type == 'text'])
+        print(f"Tool Result: {tool_output}")
+
+        # Ollama/OpenAI standard requires 'tool_call_id' in the tool role message
+        return {
+            "role": "tool",
+            "content": tool_output,
+            "tool_call_id": tool_call.get('id', 'mock_id')
+        }
+
+    except asyncio.TimeoutError:
+        print(f"Tool execution timed out: {name}")
+        return {
+            "role": "tool",
+            "content": f"Error: Tool {name} timed out after {TOOL_CALL_TIMEOUT}s.",
+            "tool_call_id": tool_call.get('id')
+        }
+    except Exception as e:
+        print(f"Tool execution failed: {e}")
+        return {
+            "role": "tool",
+            "content": f"Error: {str(e)}",
+            "tool_call_id": tool_call.get('id')
+        }
+
+SYSTEM_PROMPT = (
+    "You are a helpful assistant with access to weather and activity recommendation tools. "
+    "IMPORTANT: If the user provides a weather condition and temperature directly, "
+    "use 'get_activity_recommendation' immediately. Do NOT call 'get_weather' if you already "
+    "have the weather information."
+)
+
+async def run_chat(history: List[Dict[str, Any]], stream: bool = False,
+                   conversation: Optional[Conversation] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Runs the model/tool loop and yields progress events:
+    "token" (only when stream=True), "tool_start", "tool_end" and finally
+    "final" with the assistant's answer. With a conversation, `history` is
+    only the new message(s); the stored history is prepended and the
+    completed turn saved back.
+    """
+    new_messages = history
+    if conversation is not None:
+        history = conversation.messages + history
 
-@app.post("/chat")
-async def chat(request: ChatRequest):
     # System message to guide tool selection
-    system_msg = {
-        "role": "system", 
-        "content": (
-            "You are a helpful assistant with access to weather and activity recommendation tools. "
-            "IMPORTANT: If the user provides a weather condition and temperature directly, "
-            "use 'get_activity_recommendation' immediately. Do NOT call 'get_weather' if you already "
-            "have the weather information."
-        )
-    }
-    messages = [system_msg] + request.messages
+    system_msg = {"role": "system", "content": SYSTEM_PROMPT}
+    messages = [system_msg] + history
+
+    # Only the tools relevant to the user's messages are offered to the model,
+    # already in Ollama format. The set stays fixed for every turn.
+    query = " ".join(m.get("content") or "" for m in new_messages if m.get("role") == "user")
+    current_tools = tool_catalog().select(query)
+    if conversation is not None:
+        # Same system prompt + tools on every turn of the conversation, so
+        # the model server can reuse the cached prompt prefix
+        current_tools = conversation.pin_tools(current_tools, tool_catalog().ollama_tools)
 
     # Loop to handle multiple tool call rounds (e.g. fetch weather -> fetch activity)
     max_turns = 5
     for turn in range(max_turns):
         print(f"Turn {turn + 1}/{max_turns}...")
+
+        if stream:
+            async for event in llm.chat_stream(messages, current_tools):
+                if event["type"] == "token":
+                    yield event
+                else:
+                    response_msg = event["message"]
+        else:
+            response_msg = await llm.chat(messages, current_tools)
         
-        # Ensure inputSchema is dict for the LLM
-        current_tools = []
-        for t in mcp_tools:
-            schema = t["inputSchema"]
-            if isinstance(schema, (str, bytes)):
-                import json
-                try:
-                    schema = json.loads(schema)
-                except:
-                    pass
-            current_tools.append({**t, "inputSchema": schema})
-            
-        response_msg = await llm.chat(messages, current_tools)
-        
+        log_event("chat.turn", turn=turn + 1, tools_offered=len(current_tools),
+                  tool_calls=len(response_msg.get('tool_calls') or []))
         if not response_msg.get('tool_calls'):
             print("No tool calls. Returning final response.")
-            return response_msg
+            if conversation is not None:
+                conversation.commit(messages[1:] + [response_msg])
+            yield {"type": "final", "message": response_msg}
+            return
             
         print(f"Loop: Tool call requested by LLM: {[tc['function']['name'] for tc in response_msg['tool_calls']]}")
         messages.append(response_msg) # Add assistant's tool call message
         
-        for tool_call in response_msg['tool_calls']:
-            fn = tool_call['function']
-            name = fn['name']
-            args = fn['arguments']
-            
-            print(f"Executing tool: {name} with args: {args}")
-            
-            session = mcp_sessions.get(name)
-            if not session:
-                messages.append({"role": "tool", "content": f"Error: Tool {name} not found.", "tool_call_id": tool_call.get('id')})
-                continue
-                
-            try:
-                result = await session.call_tool(name, arguments=args)
-                tool_output = "".join([c.text for c in result.content if c.type == 'text'])
-                print(f"Tool Result: {tool_output}")
-                
-                # Ollama/OpenAI standard requires 'tool_call_id' in the tool role message
-                messages.append({
-                    "role": "tool",
-                    "content": tool_output,
-                    "tool_call_id": tool_call.get('id', 'mock_id')
-                })
-                
-            except Exception as e:
-                print(f"Tool execution failed: {e}")
-                messages.append({
-                    "role": "tool",
-                    "content": f"Error: {str(e)}",
-                    "tool_call_id": tool_call.get('id')
-                })
-
-    return {"role": "assistant", "content": "I encountered an error processing too many tool rounds."}
+        # Independent tool calls of the same turn run concurrently. Progress is
+        # reported as each finishes, but tool messages are appended in the
+        # original order so they line up with the assistant's calls.
+        tool_calls = response_msg['tool_calls']
+        for index, tool_call in enumerate(tool_calls):
+            yield {
+                "type": "tool_start",
+                "index": index,
+                "name": tool_call['function']['name'],
+                "arguments": tool_call['function']['arguments'],
+            }
+
+        async def timed_call(index: int, tool_call: Dict[str, Any]):
+            started = time.perf_counter()
+            message = await execute_tool_call(tool_call)
+            return index, message, (time.perf_counter() - started) * 1000
+
+        tool_messages: List[Optional[Dict[str, Any]]] = [None] * len(tool_calls)
+        for next_done in asyncio.as_completed([timed_call(i, tc) for i, tc in enumerate(tool_calls)]):
+            index, message, duration_ms = await next_done
+            tool_messages[index] = message
+            yield {
+                "type": "tool_end",
+                "index": index,
+                "name": tool_calls[index]['function']['name'],
+                "duration_ms": round(duration_ms, 1),
+                "content": message["content"],
+            }
+        messages.extend(tool_messages)
+
+    final_msg = {"role": "assistant", "content": "I encountered an error processing too many tool rounds."}
+    if conversation is not None:
+        conversation.commit(messages[1:] + [final_msg])
+    yield {"type": "final", "message": final_msg}
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    conversation = find_conversation(request.session_id)
+    async with admit("chat"), turn_lock(conversation):
+        async for event in run_chat(request.messages, conversation=conversation):
+            if event["type"] == "final":
+                return event["message"]
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming /chat: newline-delimited JSON events (token, tool_start,
+    tool_end, final, error) sent as they happen.
+    """
+    conversation = find_conversation(request.session_id)
+    # Admitted before the response starts, so a rejection is still a plain 429/503
+    set_priority("chat")
+    await admission["chat"].acquire()
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            admission["chat"].release()
+
+    async def ndjson():
+        try:
+            async with turn_lock(conversation):
+                async for event in run_chat(request.messages, stream=True, conversation=conversation):
+                    yield json.dumps(event, default=to_jsonable) + "\n"
+        except Exception as e:
+            print(f"Streaming chat failed: {e}")
+            yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+        finally:
+            release()
+
+    # Also released if the stream never starts (client gone before the first byte)
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson", background=BackgroundTask(release))
+
+def to_jsonable(value: Any) -> Any:
+    # Ollama messages / tool calls are pydantic models
+    if hasattr(value, "model_dump"):
+        return value.model_dump(exclude_none=True)
+    return str(value)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,105 @@
+import json
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from prometheus_client import Counter, Gauge, Histogram
+
+# Request ID of the /chat or /call request being served; carried into every
+# LLM turn, tool call and (via MCP _meta) the runtime's own trace lines.
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+HTTP_LATENCY = Histogram(
+    "slm_http_request_duration_seconds", "HTTP request latency", ["path", "status"], buckets=LATENCY_BUCKETS
+)
+LLM_LATENCY = Histogram(
+    "slm_llm_latency_seconds", "Model call latency (excluding queue wait)", ["mode", "outcome"], buckets=LATENCY_BUCKETS
+)
+LLM_QUEUE_WAIT = Histogram(
+    "slm_llm_queue_wait_seconds", "Time spent waiting for an LLM concurrency slot", buckets=LATENCY_BUCKETS
+)
+TOOL_LATENCY = Histogram(
+    "slm_tool_latency_seconds", "Tool call latency (excluding queue wait)", ["tool", "outcome"], buckets=LATENCY_BUCKETS
+)
+TOOL_QUEUE_WAIT = Histogram(
+    "slm_tool_queue_wait_seconds", "Time spent waiting for a session fan-out slot", ["tool"], buckets=LATENCY_BUCKETS
+)
+# Admission control and concurrency tokens ("chat", "call", "llm", "tool:<name>")
+QUEUE_WAIT = Histogram(
+    "slm_queue_wait_seconds", "Time spent queued for admission or a concurrency token", ["queue"],
+    buckets=LATENCY_BUCKETS,
+)
+QUEUE_DEPTH = Gauge(
+    "slm_queue_depth", "Requests waiting for admission or a concurrency token", ["queue"],
+    multiprocess_mode="livesum",
+)
+QUEUE_ACTIVE = Gauge(
+    "slm_queue_active", "Requests holding an admission slot or concurrency token", ["queue"],
+    multiprocess_mode="livesum",
+)
+QUEUE_REJECTED = Counter(
+    "slm_queue_rejected_total", "Requests turned away because a queue was full or its deadline passed",
+    ["queue", "reason"],
+)
+RESULT_CACHE_EVENTS = Counter(
+    "slm_result_cache_events_total", "Tool result cache lookups", ["tool", "result"]
+)
+RUNTIME_RESTARTS = Counter(
+    "slm_runtime_restarts_total", "Runtime respawns after a crash, hang or failed start", ["runtime"]
+)
+CIRCUIT_STATE = Gauge(
+    "slm_tool_circuit_state", "Tool circuit breaker state (0 closed, 1 half-open, 2 open)", ["tool"],
+    multiprocess_mode="mostrecent",
+)
+# Observed once per runtime start, so restarts and replicas all count
+RUNTIME_LOAD_SECONDS = Histogram(
+    "wasm_runtime_load_seconds", "Tool load time inside the runtime by phase", ["runtime", "tool", "phase"],
+    buckets=LATENCY_BUCKETS,
+)
+RUNTIME_UPSTREAM_CACHE = Gauge(
+    "wasm_runtime_upstream_cache", "Runtime upstream HTTP cache counters", ["runtime", "tier", "counter"],
+    multiprocess_mode="mostrecent",
+)
+
+def new_request_id(incoming: Optional[str] = None) -> str:
+    request_id = incoming or uuid.uuid4().hex
+    request_id_var.set(request_id)
+    return request_id
+
+def log_event(event: str, **fields: Any):
+    """
+    Writes one structured (JSON) trace line to stderr.
+    """
+    record: Dict[str, Any] = {"ts": round(time.time(), 3), "event": event}
+    request_id = request_id_var.get()
+    if request_id:
+        record["request_id"] = request_id
+    record.update(fields)
+    print(json.dumps(record, default=str), file=sys.stderr)
+
+@contextmanager
+def span(name: str, metric: Optional[Histogram] = None, labels: Optional[Dict[str, str]] = None, **fields: Any):
+    """
+    Times a block and logs it as a trace line. If a metric is given it is
+    observed with `labels` plus an "outcome" label. Yields a dict the block
+    can add fields to.
+    """
+    labels = labels or {}
+    extra: Dict[str, Any] = {}
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield extra
+    except BaseException as e:
+        outcome = "error"
+        extra.setdefault("error", repr(e))
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        if metric is not None:
+            metric.labels(**labels, outcome=outcome).observe(elapsed)
+        log_event(name, duration_ms=round(elapsed * 1000, 2), outcome=outcome, **labels, **fields, **extra)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The service's modules are imported flat, as uvicorn does from slm-service/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
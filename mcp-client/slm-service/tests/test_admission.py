@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from admission import BULK, INTERACTIVE, Limiter, Overloaded
+
+def test_hands_slots_to_higher_priority_first():
+    async def scenario():
+        limiter = Limiter("test", 1)
+        await limiter.acquire(INTERACTIVE)
+        order = []
+
+        async def wait(label, priority):
+            await limiter.acquire(priority)
+            order.append(label)
+            limiter.release()
+
+        waiters = [asyncio.create_task(wait("bulk", BULK)), asyncio.create_task(wait("chat", INTERACTIVE))]
+        await asyncio.sleep(0)
+        assert limiter.waiting() == 2
+        limiter.release()
+        await asyncio.gather(*waiters)
+        return limiter, order
+
+    limiter, order = asyncio.run(scenario())
+    assert order == ["chat", "bulk"]
+    assert limiter.stats() == {"active": 0, "limit": 1, "waiting": 0}
+
+def test_full_queue_is_rejected_with_429():
+    async def scenario():
+        limiter = Limiter("test", 1, max_queue=1)
+        await limiter.acquire()
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as excinfo:
+            await limiter.acquire()
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        return excinfo.value
+
+    assert asyncio.run(scenario()).status_code == 429
+
+def test_queue_deadline_is_rejected_with_503():
+    async def scenario():
+        limiter = Limiter("test", 1, timeout=0.01)
+        await limiter.acquire()
+        with pytest.raises(Overloaded) as excinfo:
+            await limiter.acquire()
+        return limiter, excinfo.value
+
+    limiter, error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert limiter.waiting() == 0
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        limiter = Limiter("test", 1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        limiter.release()
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.stats() == {"active": 0, "limit": 1, "waiting": 0}
+
+def test_slot_releases_on_error():
+    async def scenario():
+        limiter = Limiter("test", 1)
+        with pytest.raises(RuntimeError):
+            async with limiter.slot():
+                raise RuntimeError("boom")
+        return limiter
+
+    assert asyncio.run(scenario()).active == 0
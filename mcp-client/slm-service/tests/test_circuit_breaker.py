@@ -0,0 +1,52 @@
+import pytest
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+def fail(breaker, times):
+    for _ in range(times):
+        breaker.before_call()
+        breaker.record_failure()
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("tool", threshold=3, cooldown=60)
+    fail(breaker, 2)
+    assert breaker.state == "closed"
+    fail(breaker, 1)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_after > 0
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker("tool", threshold=2, cooldown=60)
+    fail(breaker, 1)
+    breaker.before_call()
+    breaker.record_success()
+    fail(breaker, 1)
+    assert breaker.state == "closed"
+
+def test_half_open_lets_one_trial_call_through():
+    breaker = CircuitBreaker("tool", threshold=1, cooldown=0)
+    fail(breaker, 1)
+    breaker.before_call()
+    assert breaker.state == "half-open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker("tool", threshold=5, cooldown=0)
+    fail(breaker, 5)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+def test_cancelled_trial_frees_the_slot():
+    breaker = CircuitBreaker("tool", threshold=1, cooldown=0)
+    fail(breaker, 1)
+    breaker.before_call()
+    breaker.record_cancelled()
+    assert breaker.state == "half-open"
+    breaker.before_call()
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from llm_client import LLMClient
+
+class FakeOllama:
+    """
+    Streams the given tokens; each waits for `gate` if one is set.
+    """
+
+    def __init__(self, tokens, gate=None, error=None):
+        self.tokens = tokens
+        self.gate = gate
+        self.error = error
+
+    async def chat(self, **kwargs):
+        async def stream():
+            for token in self.tokens:
+                if self.gate is not None:
+                    await self.gate.wait()
+                yield {"message": {"role": "assistant", "content": token}}
+            if self.error is not None:
+                raise self.error
+        return stream()
+
+def client_with(fake) -> LLMClient:
+    llm = LLMClient(max_concurrency=1)
+    llm.client = fake
+    return llm
+
+def test_slot_is_released_when_generation_finishes_not_when_drained():
+    async def scenario():
+        llm = client_with(FakeOllama(["a ", "b ", "c"]))
+        events = llm.chat_stream([{"role": "user", "content": "hi"}])
+        first = await events.__anext__()
+        # The caller is slow; the model is long done
+        for _ in range(10):
+            await asyncio.sleep(0)
+        active = llm.limiter.active
+        rest = [event async for event in events]
+        await llm.aclose()
+        return first, active, rest
+
+    first, active, rest = asyncio.run(scenario())
+    assert first == {"type": "token", "content": "a "}
+    assert active == 0
+    assert rest[-1] == {"type": "message", "message": {"role": "assistant", "content": "a b c"}}
+
+def test_abandoned_stream_stops_generation_and_frees_the_slot():
+    async def scenario():
+        gate = asyncio.Event()
+        gate.set()
+        fake = FakeOllama(["a ", "b ", "c"], gate=gate)
+        llm = client_with(fake)
+        events = llm.chat_stream([{"role": "user", "content": "hi"}])
+        await events.__anext__()
+        gate.clear()
+        await events.aclose()
+        await asyncio.sleep(0)
+        await llm.aclose()
+        return llm.limiter.active
+
+    assert asyncio.run(scenario()) == 0
+
+def test_failed_generation_is_raised_to_the_caller():
+    async def scenario():
+        llm = client_with(FakeOllama(["a "], error=RuntimeError("model crashed")))
+        with pytest.raises(RuntimeError, match="model crashed"):
+            async for _ in llm.chat_stream([{"role": "user", "content": "hi"}]):
+                pass
+        await llm.aclose()
+        return llm.limiter.active
+
+    assert asyncio.run(scenario()) == 0
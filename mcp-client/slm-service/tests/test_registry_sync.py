@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+import runtimes
+from registry_sync import RegistrySync
+
+class FakeResponse:
+    status_code = 200
+    headers = {"ETag": '"v1"'}
+
+    def __init__(self, servers):
+        self.servers = servers
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.servers
+
+def test_etag_is_only_kept_once_the_listing_is_applied():
+    async def scenario():
+        applied = []
+
+        async def apply(servers):
+            if not applied:
+                applied.append("failed")
+                raise RuntimeError("replacement failed")
+            applied.append("ok")
+
+        sync = RegistrySync("http://registry", apply)
+        sent = []
+
+        async def get(url, headers):
+            sent.append(headers)
+            return FakeResponse([])
+
+        sync.client.get = get
+        with pytest.raises(RuntimeError):
+            await sync.sync_once()
+        assert sync.etag is None
+        assert await sync.sync_once() == []
+        await sync.client.aclose()
+        return sync, sent
+
+    sync, sent = asyncio.run(scenario())
+    assert sync.etag == '"v1"'
+    # The retry asked for the full listing again
+    assert sent == [{}, {}]
+
+def test_failed_replacement_is_retried(monkeypatch):
+    replaced = []
+    swap_ok = [False]
+
+    async def replace_runtime(name, plan):
+        replaced.append(name)
+        return swap_ok[0]
+
+    monkeypatch.setattr(runtimes, "known_runtimes", {})
+    monkeypatch.setattr(runtimes, "start_runtime", lambda name, plan: None)
+    monkeypatch.setattr(runtimes, "replace_runtime", replace_runtime)
+
+    def listing(binary_url, config=None):
+        return [{"name": "tool", "binaryUrl": binary_url, "runtimeConfig": config or {}}]
+
+    async def scenario():
+        assert await runtimes.sync_runtimes(listing("http://a/v1.wasm"))
+        with pytest.raises(RuntimeError):
+            await runtimes.sync_runtimes(listing("http://a/v2.wasm"))
+        swap_ok[0] = True
+        assert await runtimes.sync_runtimes(listing("http://a/v2.wasm"))
+        assert not await runtimes.sync_runtimes(listing("http://a/v2.wasm"))
+        # Orchestrator-only settings do not restart the runtime
+        assert not await runtimes.sync_runtimes(listing("http://a/v2.wasm", {"resultCache": {"t": 60}}))
+
+    asyncio.run(scenario())
+    assert replaced == ["tool", "tool"]
@@ -0,0 +1,119 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from result_cache import ResultCache, cache_policies
+
+def test_caches_results_of_listed_tools_only():
+    async def scenario():
+        cache = ResultCache()
+        cache.set_policies({"cached": 60})
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            return SimpleNamespace(isError=False, content=[])
+
+        for _ in range(3):
+            await cache.call("cached", {"city": "Rome"}, fn)
+            await cache.call("uncached", {"city": "Rome"}, fn)
+        return cache, calls
+
+    cache, calls = asyncio.run(scenario())
+    assert len(calls) == 4
+    assert (cache.hits, cache.misses) == (2, 1)
+
+def test_errors_are_not_cached():
+    async def scenario():
+        cache = ResultCache()
+        cache.set_policies({"tool": 60})
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            return SimpleNamespace(isError=True, content=[])
+
+        await cache.call("tool", {}, fn)
+        await cache.call("tool", {}, fn)
+        return calls
+
+    assert len(asyncio.run(scenario())) == 2
+
+def test_concurrent_identical_calls_share_one_execution():
+    async def scenario():
+        cache = ResultCache()
+        cache.set_policies({"tool": 60})
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return SimpleNamespace(isError=False, content=[])
+
+        results = await asyncio.gather(*(cache.call("tool", {"a": 1}, fn) for _ in range(5)))
+        return cache, calls, results
+
+    cache, calls, results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert cache.collapsed == 4
+    assert all(result is results[0] for result in results)
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def scenario():
+        cache = ResultCache()
+        cache.set_policies({"tool": 60})
+        release = asyncio.Event()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await release.wait()
+            return SimpleNamespace(isError=False, content=["done"])
+
+        leader = asyncio.create_task(cache.call("tool", {}, fn))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.call("tool", {}, fn))
+        await asyncio.sleep(0)
+        # e.g. the leader's client disconnected
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        result = await follower
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return cache, calls, result
+
+    cache, calls, result = asyncio.run(scenario())
+    assert result.content == ["done"]
+    assert len(calls) == 1
+    # The shared call still completed and was cached
+    assert cache.stats()["entries"] == 1
+
+def test_call_is_cancelled_once_every_caller_has_gone():
+    async def scenario():
+        cache = ResultCache()
+        cache.set_policies({"tool": 60})
+        cancelled = asyncio.Event()
+
+        async def fn():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        callers = [asyncio.create_task(cache.call("tool", {}, fn)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+    asyncio.run(scenario())
+
+def test_cache_policies_skip_invalid_ttls():
+    servers = [
+        {"name": "a", "runtimeConfig": {"resultCache": {"x": 60, "y": "bad", "z": 0}}},
+        {"name": "b"},
+    ]
+    assert cache_policies(servers) == {"x": 60.0}
@@ -0,0 +1,30 @@
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, ErrorData
+
+import runtimes
+from runtimes import RuntimeConnection, RuntimePlan, ToolUnavailableError, is_transport_closed, missing_tool_error
+
+def connection(status, tools):
+    runtime = RuntimeConnection("weather-tool", RuntimePlan(["http://a/weather-tool.wasm"], {}, "key"))
+    runtime.status = status
+    runtime.offered_tools = tools
+    return runtime
+
+def test_respawning_runtime_tools_are_unavailable_not_missing(monkeypatch):
+    monkeypatch.setattr(runtimes, "runtimes", {"weather-tool": connection("restarting", ["get_weather"])})
+    error = missing_tool_error("get_weather")
+    assert isinstance(error, ToolUnavailableError)
+    assert error.retry_after >= 1
+    assert isinstance(missing_tool_error("unknown"), LookupError)
+
+def test_stopped_runtime_tools_are_missing(monkeypatch):
+    runtime = connection("stopped", ["get_weather"])
+    runtime.stopping = True
+    monkeypatch.setattr(runtimes, "runtimes", {"weather-tool": runtime})
+    assert isinstance(missing_tool_error("get_weather"), LookupError)
+
+def test_connection_closed_counts_as_transport_closed():
+    closed = McpError(ErrorData(code=CONNECTION_CLOSED, message="Connection closed"))
+    assert is_transport_closed(closed)
+    assert is_transport_closed(ExceptionGroup("transport", [closed]))
+    assert not is_transport_closed(McpError(ErrorData(code=-32602, message="Invalid params")))
@@ -0,0 +1,63 @@
+from sessions import Conversation, ConversationStore, tool_names, trim_history
+
+def tool(name):
+    return {"type": "function", "function": {"name": name, "description": "", "parameters": {}}}
+
+def turn(question, answer):
+    return [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+
+def test_pinned_tools_keep_their_order_when_the_catalog_is_reordered():
+    conversation = Conversation("s")
+    catalog = [tool("b"), tool("a"), tool("c")]
+    assert tool_names(conversation.pin_tools([tool("b"), tool("a")], catalog)) == ["b", "a"]
+    # register_tools rebuilt the catalog in another order
+    reordered = [tool("c"), tool("a"), tool("b")]
+    assert tool_names(conversation.pin_tools([tool("a")], reordered)) == ["b", "a"]
+    # A newly relevant tool is appended, never inserted
+    assert tool_names(conversation.pin_tools([tool("c")], reordered)) == ["b", "a", "c"]
+
+def test_unpublished_tools_are_dropped_from_the_pinned_set():
+    conversation = Conversation("s")
+    conversation.pin_tools([tool("a"), tool("b")], [tool("a"), tool("b")])
+    assert tool_names(conversation.pin_tools([], [tool("b")])) == ["b"]
+
+def test_trim_history_keeps_short_histories():
+    messages = turn("hi", "hello")
+    assert trim_history(messages, budget=1000) is messages
+
+def test_trim_history_drops_whole_turns_down_to_target():
+    messages = turn("q1 " * 40, "a1 " * 40) + turn("q2 " * 40, "a2 " * 40) + turn("q3", "a3")
+    trimmed = trim_history(messages, budget=60, target=0.6)
+    assert trimmed[0]["role"] == "user"
+    assert trimmed[-2:] == messages[-2:]
+    assert len(trimmed) < len(messages)
+
+def test_trim_history_never_drops_the_latest_turn():
+    messages = turn("q " * 500, "a " * 500)
+    assert trim_history(messages, budget=10) == messages
+
+def test_tool_results_stay_with_their_calls():
+    messages = [
+        {"role": "user", "content": "x " * 100},
+        {"role": "assistant", "content": "", "tool_calls": [{"function": {"name": "t", "arguments": {}}}]},
+        {"role": "tool", "content": "r " * 100},
+        {"role": "assistant", "content": "done"},
+        {"role": "user", "content": "next"},
+    ]
+    assert trim_history(messages, budget=50) == messages[-1:]
+
+def test_store_evicts_least_recently_used():
+    store = ConversationStore(max_sessions=2, ttl=60)
+    first, second = store.create(), store.create()
+    store.get(first.id)
+    store.create()
+    assert store.get(second.id) is None
+    assert store.get(first.id) is first
+    assert store.evicted == 1
+
+def test_store_expires_idle_sessions():
+    store = ConversationStore(max_sessions=10, ttl=0)
+    conversation = store.create()
+    conversation.last_used -= 1
+    assert store.get(conversation.id) is None
+    assert store.expired == 1
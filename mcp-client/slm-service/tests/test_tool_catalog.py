@@ -0,0 +1,56 @@
+from tool_catalog import ToolCatalog, tokenize
+
+TOOLS = [
+    {
+        "name": "get_activity_recommendation",
+        "description": "Suggest activities based on specific weather condition and temperature.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "condition": {"type": "string", "description": "The weather condition (e.g., Sunny, Rain, Cloudy)"},
+                "temp": {"type": "number", "description": "The temperature in Celsius"},
+            },
+        },
+    },
+    {
+        "name": "get_weather",
+        "description": "Get current weather for a city.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"city": {"type": "string", "description": "Name of the city (e.g., Gurgaon, Bangalore)"}},
+        },
+    },
+    {
+        "name": "convert_currency",
+        "description": "Convert an amount between two currencies.",
+        "inputSchema": '{"type": "object", "properties": {"amount": {"type": "number"}}}',
+    },
+]
+
+def names(tools):
+    return [tool["function"]["name"] for tool in tools]
+
+def test_tokenize_drops_stopwords_and_short_tokens():
+    assert tokenize("What's the weather in Rome?") == ["weather", "rome"]
+
+def test_picks_tool_named_after_the_query():
+    catalog = ToolCatalog(TOOLS)
+    assert names(catalog.select("weather in Rome?", k=1)) == ["get_weather"]
+
+def test_top_k_in_catalog_order():
+    catalog = ToolCatalog(TOOLS)
+    selected = names(catalog.select("what should I do in this weather and temperature", k=2))
+    assert selected == ["get_activity_recommendation", "get_weather"]
+
+def test_no_match_returns_every_tool():
+    catalog = ToolCatalog(TOOLS)
+    assert names(catalog.select("tell me a joke", k=1)) == names(catalog.ollama_tools)
+
+def test_k_zero_or_small_catalog_returns_every_tool():
+    catalog = ToolCatalog(TOOLS)
+    assert len(catalog.select("currency", k=0)) == 3
+    assert len(catalog.select("currency", k=3)) == 3
+
+def test_string_input_schema_is_parsed():
+    catalog = ToolCatalog(TOOLS)
+    assert catalog.tools[2]["inputSchema"]["properties"]["amount"] == {"type": "number"}
@@ -0,0 +1,98 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from llm_client import to_ollama_tools
+
+# Max tools sent to the model per request (0 sends every tool)
+TOOL_TOP_K = int(os.environ.get("TOOL_TOP_K", "8"))
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Words that say nothing about which tool is wanted; left in, they match
+# whichever description happens to use them
+STOPWORDS = frozenset("""
+    a about an and any are as at be by can could do does for from give how i
+    in is it me my of on or please should so than that the their them there
+    these this to us was we what when where which who will with would you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    # Single characters (e.g. the "s" of "what's") are dropped with the stopwords
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+def normalize_schema(schema: Any) -> Any:
+    # Some servers hand back inputSchema as a JSON string
+    if isinstance(schema, (str, bytes)):
+        try:
+            return json.loads(schema)
+        except ValueError:
+            return schema
+    return schema
+
+class ToolCatalog:
+    """
+    Immutable snapshot of the registered tools, converted to the Ollama
+    format once, with a BM25 index over tool names, descriptions and
+    parameter descriptions for picking the tools relevant to a request.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    # Extra weight of a query term that appears in the tool's name, on top
+    # of its BM25 score over the whole document
+    NAME_WEIGHT = 2.0
+
+    def __init__(self, tools: List[Dict[str, Any]]):
+        self.tools: Tuple[Dict[str, Any], ...] = tuple(
+            {**t, "inputSchema": normalize_schema(t["inputSchema"])} for t in tools
+        )
+        self.ollama_tools: Tuple[Dict[str, Any], ...] = tuple(to_ollama_tools(list(self.tools)) or ())
+
+        self._docs = [Counter(tokenize(self._document(t))) for t in self.tools]
+        self._names = [set(tokenize(t["name"].replace("_", " "))) for t in self.tools]
+        self._lengths = [sum(doc.values()) for doc in self._docs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        df = Counter(term for doc in self._docs for term in doc)
+        n = len(self._docs)
+        self._idf = {term: math.log(1 + (n - freq + 0.5) / (freq + 0.5)) for term, freq in df.items()}
+
+    @staticmethod
+    def _document(tool: Dict[str, Any]) -> str:
+        parts = [tool["name"].replace("_", " "), tool.get("description") or ""]
+        schema = tool.get("inputSchema")
+        if isinstance(schema, dict):
+            for prop, spec in (schema.get("properties") or {}).items():
+                parts.append(prop)
+                if isinstance(spec, dict):
+                    parts.append(spec.get("description") or "")
+        return " ".join(parts)
+
+    def _score(self, index: int, terms: List[str]) -> float:
+        doc = self._docs[index]
+        norm = self.K1 * (1 - self.B + self.B * self._lengths[index] / (self._avg_length or 1))
+        score = 0.0
+        for term in terms:
+            tf = doc.get(term)
+            if tf:
+                score += self._idf[term] * tf * (self.K1 + 1) / (tf + norm)
+                if term in self._names[index]:
+                    score += self.NAME_WEIGHT * self._idf[term]
+        return score
+
+    def select(self, query: str, k: int = TOOL_TOP_K) -> List[Dict[str, Any]]:
+        """
+        Returns the top-k tools (Ollama format) for the query, in catalog
+        order. Every tool is returned with k <= 0, with no more than k tools,
+        or when no query term matches any tool (rather than an arbitrary k).
+        """
+        if k <= 0 or len(self.ollama_tools) <= k:
+            return list(self.ollama_tools)
+        terms = set(tokenize(query))
+        scores = [self._score(i, terms) for i in range(len(self.tools))]
+        if not any(score > 0 for score in scores):
+            return list(self.ollama_tools)
+        top = sorted(range(len(self.tools)), key=lambda i: (-scores[i], i))[:k]
+        return [self.ollama_tools[i] for i in sorted(top)]
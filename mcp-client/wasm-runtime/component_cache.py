@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import platform
+import tempfile
+from importlib.metadata import version
+from pathlib import Path
+from typing import Dict, Any
+from wasmtime import Config, Engine
+from wasmtime.component import Component
+from instance_pool import CALL_FUEL
+
+# Engine settings shared by the runtime and the precompile command. They are
+# part of the artifact key: a component compiled under different settings (or
+# another wasmtime version / CPU) is never deserialized.
+ENGINE_SETTINGS: Dict[str, Any] = {
+    "wasm_component_model": True,
+    # Per-call budgets enforced by instance_pool need instrumented code
+    "consume_fuel": CALL_FUEL > 0,
+    "epoch_interruption": True,
+}
+
+def create_config(settings: Dict[str, Any] = ENGINE_SETTINGS) -> Config:
+    config = Config()
+    for name, value in settings.items():
+        setattr(config, name, value)
+    return config
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ComponentCache:
+    """
+    Store of ahead-of-time compiled components.
+
+    Artifacts live at <cache_dir>/<key>.cwasm where the key hashes the binary's
+    SHA-256, the wasmtime version, the host target and ENGINE_SETTINGS. Loading
+    goes through Component.deserialize_file, which memory-maps the artifact
+    instead of compiling the binary again.
+    """
+
+    def __init__(self, engine: Engine, cache_dir: str = "cache/compiled", settings: Dict[str, Any] = ENGINE_SETTINGS):
+        self.engine = engine
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # (mode, seconds) of the most recent load: "deserialize" or "compile"
+        self.last_load = ("", 0.0)
+        self.fingerprint = json.dumps({
+            "wasmtime": version("wasmtime"),
+            "target": f"{platform.system()}-{platform.machine()}",
+            "settings": settings,
+        }, sort_keys=True)
+
+    def key(self, wasm_path: Path) -> str:
+        return hashlib.sha256(f"{file_sha256(wasm_path)}:{self.fingerprint}".encode()).hexdigest()
+
+    def artifact_path(self, wasm_path: Path) -> Path:
+        return self.cache_dir / f"{self.key(wasm_path)}.cwasm"
+
+    def load(self, wasm_path: Path) -> Component:
+        """
+        Returns the component for a binary, deserializing a stored artifact
+        when there is one and compiling (and storing) it otherwise.
+        """
+        artifact = self.artifact_path(wasm_path)
+        started = time.perf_counter()
+        if artifact.exists():
+            try:
+                component = Component.deserialize_file(self.engine, str(artifact))
+                self.last_load = ("deserialize", time.perf_counter() - started)
+                print(f"Deserialized {wasm_path.name} in {(time.perf_counter() - started) * 1000:.1f}ms", file=sys.stderr)
+                return component
+            except Exception as e:
+                # Corrupt or incompatible artifact; rebuild it below
+                print(f"Discarding compiled artifact {artifact.name}: {e}", file=sys.stderr)
+                artifact.unlink(missing_ok=True)
+
+        component = self.compile(wasm_path, artifact)
+        self.last_load = ("compile", time.perf_counter() - started)
+        print(f"Compiled {wasm_path.name} in {(time.perf_counter() - started) * 1000:.1f}ms", file=sys.stderr)
+        return component
+
+    def compile(self, wasm_path: Path, artifact: Path) -> Component:
+        component = Component.from_file(self.engine, str(wasm_path))
+        # Write to a temp file and rename so a concurrent reader never maps a
+        # partially written artifact.
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(component.serialize())
+            os.replace(tmp_name, artifact)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        return component
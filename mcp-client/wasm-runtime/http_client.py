@@ -0,0 +1,114 @@
+import os
+import json
+import time
+import httpx
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from singleflight import SingleFlight
+from tracing import log_event, span
+
+# Cache tiers for upstream lookups (seconds / entries)
+GEOCODE_TTL = float(os.environ.get("UPSTREAM_GEOCODE_TTL", str(24 * 3600)))
+WEATHER_TTL = float(os.environ.get("UPSTREAM_WEATHER_TTL", "300"))
+UPSTREAM_CACHE_SIZE = int(os.environ.get("UPSTREAM_CACHE_SIZE", "1024"))
+UPSTREAM_MAX_CONNECTIONS = int(os.environ.get("UPSTREAM_MAX_CONNECTIONS", "32"))
+UPSTREAM_TIMEOUT = float(os.environ.get("UPSTREAM_TIMEOUT", "10"))
+
+class TTLCache:
+    """
+    LRU cache whose entries also expire after a fixed TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: Any, value: Any):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+class UpstreamClient:
+    """
+    Runtime-wide HTTP client for tool upstream calls: one keep-alive HTTP/2
+    connection pool, TTL'd response caches, and collapsing of concurrent
+    identical requests into a single upstream fetch.
+    """
+
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(UPSTREAM_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=UPSTREAM_MAX_CONNECTIONS,
+                max_keepalive_connections=UPSTREAM_MAX_CONNECTIONS,
+            ),
+        )
+        self.caches = {
+            "geocode": TTLCache(UPSTREAM_CACHE_SIZE, GEOCODE_TTL),
+            "weather": TTLCache(UPSTREAM_CACHE_SIZE, WEATHER_TTL),
+        }
+        self._inflight = SingleFlight()
+        self.collapsed = 0
+
+    async def get_json(self, url: str, params: Dict[str, Any], tier: str) -> Any:
+        """
+        GETs a JSON document through the given cache tier. Only successful
+        responses are cached.
+        """
+        cache = self.caches[tier]
+        key = (url, json.dumps(params, sort_keys=True))
+        cached = cache.get(key)
+        if cached is not None:
+            log_event("upstream.get", tier=tier, cache="hit")
+            return cached
+
+        async def fetch():
+            with span("upstream.get", tier=tier, cache="miss", url=url) as trace:
+                resp = await self.client.get(url, params=params)
+                trace["status"] = resp.status_code
+                trace["http_version"] = resp.http_version
+                resp.raise_for_status()
+                data = resp.json()
+            cache.set(key, data)
+            return data
+
+        if key in self._inflight:
+            self.collapsed += 1
+            with span("upstream.get", tier=tier, cache="collapsed"):
+                return await self._inflight.do(key, fetch)
+        return await self._inflight.do(key, fetch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "caches": {tier: cache.stats() for tier, cache in self.caches.items()},
+            "collapsed": self.collapsed,
+        }
+
+    async def aclose(self):
+        await self.client.aclose()
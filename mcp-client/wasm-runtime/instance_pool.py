@@ -0,0 +1,172 @@
+import asyncio
+import os
+import sys
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Callable, List, Set
+from wasmtime import Engine, Store
+from wasmtime.component import Component, Linker
+
+# Pool sizing per tool
+POOL_MIN_SIZE = int(os.environ.get("WASM_POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE = int(os.environ.get("WASM_POOL_MAX_SIZE", "4"))
+# Per-call fuel budget (0 disables fuel metering)
+CALL_FUEL = int(os.environ.get("WASM_CALL_FUEL", "0"))
+# Per-call wall-clock budget, in epoch ticks of EPOCH_TICK_MS
+EPOCH_TICK_MS = int(os.environ.get("WASM_EPOCH_TICK_MS", "10"))
+CALL_EPOCH_TICKS = int(os.environ.get("WASM_CALL_EPOCH_TICKS", "1000"))
+# Linear memory cap per instance
+MEMORY_LIMIT_BYTES = int(os.environ.get("WASM_MEMORY_LIMIT_BYTES", str(256 * 1024 * 1024)))
+# Instances are discarded and rebuilt after this many calls
+RECYCLE_AFTER_CALLS = int(os.environ.get("WASM_RECYCLE_AFTER_CALLS", "1000"))
+# ...or once calls on them have grown the process's resident memory by this
+# many bytes in total (0 disables)
+RECYCLE_MEMORY_GROWTH = int(os.environ.get("WASM_RECYCLE_MEMORY_GROWTH", str(64 * 1024 * 1024)))
+
+def resident_bytes() -> int:
+    """
+    Current resident set size of this process, or 0 where /proc is missing.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+class PooledInstance:
+    def __init__(self, store: Store, instance: Any):
+        self.store = store
+        self.instance = instance
+        self.calls = 0
+        # Resident memory growth seen across this instance's calls
+        self.grown = 0
+
+class EpochTicker:
+    """
+    Advances the engine epoch from a background thread. WASM runs synchronously
+    (off the event loop), so the ticker cannot be an asyncio task.
+    """
+
+    def __init__(self, engine: Engine, interval_ms: int = EPOCH_TICK_MS):
+        self.engine = engine
+        self.interval = interval_ms / 1000
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="wasm-epoch-ticker", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.engine.increment_epoch()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+class InstancePool:
+    """
+    Pre-instantiated instances of one component.
+
+    Each call leases an instance with fresh fuel / epoch budgets. Instances are
+    recycled after RECYCLE_AFTER_CALLS calls, as soon as a call fails (a trap
+    includes exceeding the MEMORY_LIMIT_BYTES cap), or once their calls have
+    grown resident memory by RECYCLE_MEMORY_GROWTH. wasmtime-py does not
+    expose a store's memory usage, so growth is measured as the process RSS
+    before and after each call; with calls in parallel an instance may be
+    charged for another's growth, which only recycles it earlier.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        linker: Linker,
+        component: Component,
+        new_store: Callable[[], Store],
+        min_size: int = POOL_MIN_SIZE,
+        max_size: int = POOL_MAX_SIZE,
+    ):
+        self.name = name
+        self.linker = linker
+        self.component = component
+        self.new_store = new_store
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.idle: List[PooledInstance] = []
+        self.semaphore = asyncio.Semaphore(max_size)
+        self.recycled = 0
+        # Background instantiations topping the pool back up after a recycle
+        self._refills: Set[asyncio.Task] = set()
+
+    def _instantiate(self) -> PooledInstance:
+        store = self.new_store()
+        store.set_limits(memory_size=MEMORY_LIMIT_BYTES)
+        # Start code runs during instantiation under the same budgets as a
+        # call; without them a store traps at once (epoch deadline 0, no fuel)
+        self._reset_budgets(store)
+        instance = self.linker.instantiate(store, self.component)
+        return PooledInstance(store, instance)
+
+    @staticmethod
+    def _reset_budgets(store: Store):
+        if CALL_FUEL:
+            store.set_fuel(CALL_FUEL)
+        store.set_epoch_deadline(CALL_EPOCH_TICKS)
+
+    def prefill(self):
+        """
+        Instantiates min_size instances up front. Raises if the component
+        cannot be instantiated at all.
+        """
+        while len(self.idle) < max(self.min_size, 1):
+            self.idle.append(self._instantiate())
+
+    @asynccontextmanager
+    async def acquire(self):
+        async with self.semaphore:
+            pooled = self.idle.pop() if self.idle else await asyncio.to_thread(self._instantiate)
+            self._reset_budgets(pooled.store)
+            try:
+                yield pooled
+            except BaseException:
+                self._recycle(pooled, "call failed")
+                raise
+            pooled.calls += 1
+            if pooled.calls >= RECYCLE_AFTER_CALLS:
+                self._recycle(pooled, f"{pooled.calls} calls")
+            elif RECYCLE_MEMORY_GROWTH and pooled.grown >= RECYCLE_MEMORY_GROWTH:
+                self._recycle(pooled, f"memory grew {pooled.grown // (1024 * 1024)}MiB")
+            else:
+                self.idle.append(pooled)
+
+    async def run(self, fn: Callable[[PooledInstance], Any]) -> Any:
+        """
+        Runs fn against a leased instance on a worker thread, so calls to the
+        same tool execute in parallel up to max_size.
+        """
+        async with self.acquire() as pooled:
+            return await asyncio.to_thread(self._measured, fn, pooled)
+
+    @staticmethod
+    def _measured(fn: Callable[[PooledInstance], Any], pooled: PooledInstance) -> Any:
+        before = resident_bytes()
+        try:
+            return fn(pooled)
+        finally:
+            pooled.grown += max(0, resident_bytes() - before)
+
+    def _recycle(self, pooled: PooledInstance, reason: str):
+        self.recycled += 1
+        print(f"Recycling {self.name} instance ({reason})", file=sys.stderr)
+        # Top the pool back up to its minimum so the next call does not pay
+        # for instantiation. This runs on a worker thread after the lease is
+        # returned, so neither the caller nor the event loop waits for it.
+        if len(self.idle) + len(self._refills) < self.min_size:
+            task = asyncio.create_task(self._refill())
+            self._refills.add(task)
+            task.add_done_callback(self._refills.discard)
+
+    async def _refill(self):
+        try:
+            self.idle.append(await asyncio.to_thread(self._instantiate))
+        except Exception as e:
+            print(f"Could not refill {self.name} pool: {e}", file=sys.stderr)
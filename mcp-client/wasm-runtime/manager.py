@@ -1,34 +1,202 @@
+import fcntl
 import os
+import sys
+import json
+import time
 import httpx
 import hashlib
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
+from urllib.parse import urlsplit
+from typing import Dict, Any, Optional
+
+from singleflight import SingleFlight
+
+# Directory holding downloaded binaries (and compiled artifacts under compiled/)
+TOOL_CACHE_DIR = os.environ.get("TOOL_CACHE_DIR", "cache")
+# Max total size of cached binaries before least-recently-used ones are evicted
+TOOL_CACHE_MAX_BYTES = int(os.environ.get("TOOL_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+# Binaries used (or downloaded) this recently are never evicted, so a path
+# another runtime process just got from get_tool stays valid while it loads it
+TOOL_CACHE_EVICT_GRACE = float(os.environ.get("TOOL_CACHE_EVICT_GRACE", "600"))
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
 
 class ToolManager:
-    def __init__(self, cache_dir: str = "cache"):
+    """
+    Content-addressed cache of WASM binaries.
+
+    Binaries are stored once under blobs/<sha256>.wasm; index.json maps each
+    URL to its blob, validators and last use so a republished binary is
+    picked up through If-None-Match (or If-Modified-Since) revalidation.
+    URLs served with Cache-Control: immutable are never revalidated.
+    Every runtime process shares the directory, so index updates and
+    eviction happen under an flock on index.lock.
+    """
+
+    def __init__(self, cache_dir: str = TOOL_CACHE_DIR, max_bytes: int = TOOL_CACHE_MAX_BYTES):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
+        self.blob_dir = self.cache_dir / "blobs"
+        self.blob_dir.mkdir(exist_ok=True)
+        self.index_path = self.cache_dir / "index.json"
+        self.lock_path = self.cache_dir / "index.lock"
+        self.max_bytes = max_bytes
+        # Concurrent get_tool calls for the same URL share one download
+        self._inflight = SingleFlight()
+        # Reused for every download and revalidation
+        self.client = httpx.AsyncClient()
+
+    @staticmethod
+    def tool_name(url: str) -> str:
+        """
+        Logical tool name of a binary URL (its last path segment without .wasm).
+        """
+        filename = urlsplit(url).path.split("/")[-1]
+        return filename[:-len(".wasm")] if filename.endswith(".wasm") else filename
 
     async def get_tool(self, url: str) -> Path:
         """
-        Downloads the WASM binary from the URL if not cached.
-        Returns the path to the local file.
-        """
-        filename = url.split("/")[-1]
-        if not filename.endswith(".wasm"):
-            filename += ".wasm"
-            
-        local_path = self.cache_dir / filename
-        
-        # Simple cache check (for now, assume name uniqueness or url hash)
-        # In prod, we'd hash the URL or respect ETags.
-        if local_path.exists():
-            return local_path
-
-        print(f"Downloading tool from {url}...")
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url)
-            resp.raise_for_status()
-            local_path.write_bytes(resp.content)
-            
-        print(f"Saved to {local_path}")
-        return local_path
+        Downloads the WASM binary from the URL if not cached, or if it changed
+        upstream. Returns the path to the local file.
+        """
+        return await self._inflight.do(url, lambda: self._fetch(url))
+
+    async def _fetch(self, url: str) -> Path:
+        index = self._load_index()
+        entry = index.get(url)
+        cached = self._blob_path(entry["sha256"]) if entry else None
+        if cached is not None and not cached.exists():
+            entry, cached = None, None
+        if cached is not None and entry.get("immutable"):
+            # Served as immutable (e.g. Artifactory's sha256 URLs): never changes
+            return self._use_cached(url, entry, cached) or await self._fetch(url)
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        elif entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            async with self.client.stream("GET", url, headers=headers) as resp:
+                if resp.status_code == 304 and cached is not None:
+                    return self._use_cached(url, entry, cached) or await self._fetch(url)
+
+                resp.raise_for_status()
+                print(f"Downloading tool from {url}...", file=sys.stderr)
+                sha256, size = await self._stream_to_blob(resp)
+                etag = resp.headers.get("ETag")
+                last_modified = resp.headers.get("Last-Modified")
+                immutable = "immutable" in resp.headers.get("Cache-Control", "")
+        except httpx.HTTPError as e:
+            # Registry/Artifactory outage: fall back to the last good copy
+            if cached is not None:
+                print(f"Revalidation of {url} failed ({e}); using cached copy.", file=sys.stderr)
+                return self._use_cached(url, entry, cached) or await self._fetch(url)
+            raise
+
+        entry = {"sha256": sha256, "etag": etag, "last_modified": last_modified, "size": size,
+                 "immutable": immutable}
+        self._touch(url, entry)
+        path = self._blob_path(sha256)
+        print(f"Saved to {path}", file=sys.stderr)
+        self._evict(keep=sha256)
+        return path
+
+    async def _stream_to_blob(self, resp: httpx.Response):
+        """
+        Streams the body to a temp file while hashing it, then renames it into
+        place so readers never see a partial binary.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.blob_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in resp.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            sha256 = digest.hexdigest()
+            os.replace(tmp_name, self._blob_path(sha256))
+            return sha256, size
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+    def _blob_path(self, sha256: str) -> Path:
+        return self.blob_dir / f"{sha256}.wasm"
+
+    def _use_cached(self, url: str, entry: Dict[str, Any], cached: Path) -> Optional[Path]:
+        """
+        Marks a cached blob as used. Returns None if another process evicted
+        it in the meantime; once touched it is safe for the grace period.
+        """
+        self._touch(url, entry)
+        return cached if cached.exists() else None
+
+    @contextmanager
+    def _index_lock(self):
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load_index(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self.index_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_index(self, index: Dict[str, Any]):
+        # Several runtime processes share this directory; write atomically
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_name, self.index_path)
+
+    def _touch(self, url: str, entry: Dict[str, Any]):
+        with self._index_lock():
+            index = self._load_index()
+            index[url] = {**entry, "last_used": time.time()}
+            self._save_index(index)
+
+    def _evict(self, keep: Optional[str] = None):
+        """
+        Drops least-recently-used entries until the cache fits in max_bytes.
+        Blobs used or written within TOOL_CACHE_EVICT_GRACE seconds are kept.
+        """
+        with self._index_lock():
+            index = self._load_index()
+            blobs = {p.stem: p.stat() for p in self.blob_dir.glob("*.wasm")}
+            total = sum(st.st_size for st in blobs.values())
+            if total <= self.max_bytes:
+                return
+
+            # A blob's last use is the most recent use of any URL pointing at
+            # it, or its download if no index entry records it yet
+            last_used: Dict[str, float] = {sha: st.st_mtime for sha, st in blobs.items()}
+            for entry in index.values():
+                sha = entry.get("sha256")
+                if sha in last_used:
+                    last_used[sha] = max(last_used[sha], entry.get("last_used", 0.0))
+
+            recent = time.time() - TOOL_CACHE_EVICT_GRACE
+            for sha in sorted(last_used, key=last_used.get):
+                if total <= self.max_bytes or last_used[sha] >= recent:
+                    break
+                if sha == keep:
+                    continue
+                self._blob_path(sha).unlink(missing_ok=True)
+                total -= blobs[sha].st_size
+                index = {url: e for url, e in index.items() if e.get("sha256") != sha}
+                print(f"Evicted cached binary {sha}", file=sys.stderr)
+
+            self._save_index(index)
+
+    async def aclose(self):
+        await self.client.aclose()
@@ -12,36 +12,70 @@ from manager import ToolManager
 # In a real impl, this would load the .wasm component.
 
 import asyncio
+import os
 import sys
 import argparse
 import json
+import resource
+import time
 from typing import Any, List, Dict
 from mcp.server.lowlevel import Server
-from mcp.types import Tool, TextContent, CallToolResult
-from manager import ToolManager
-from wasmtime import Config, Engine, Store, WasiConfig
-from wasmtime.component import Component, Linker
+from mcp.types import Tool, TextContent, CallToolResult, Resource
+from pydantic import AnyUrl
+from manager import TOOL_CACHE_DIR, ToolManager
+from component_cache import ComponentCache, create_config
+from instance_pool import EpochTicker, InstancePool
+from http_client import UpstreamClient
+from tracing import request_id_var, span
+from wasmtime import Engine, Store, WasiConfig
+from wasmtime.component import Linker
+
+STATS_URI = "runtime://stats"
+
+# Tool name -> component (binary) that provides it
+TOOL_COMPONENTS = {
+    "get_weather": "weather-tool",
+    "get_activity_recommendation": "activity-advisor",
+}
+
+def native_exports(pool: InstancePool, component: str) -> Dict[str, str]:
+    """
+    Tool name -> export of the component's tools that it implements natively
+    as `<tool-name>: func(arguments: string) -> string` (JSON in and out).
+    Components without such exports are served by the simulated handlers.
+    """
+    pooled = pool.idle[0]
+    exports = {}
+    for tool, owner in TOOL_COMPONENTS.items():
+        export = tool.replace("_", "-")
+        if owner == component and pooled.instance.get_func(pooled.store, export) is not None:
+            exports[tool] = export
+    return exports
+
+# Upstream endpoints used by the simulated weather tool
+GEOCODING_URL = os.environ.get("GEOCODING_URL", "https://geocoding-api.open-meteo.com/v1/search")
+FORECAST_URL = os.environ.get("FORECAST_URL", "https://api.open-meteo.com/v1/forecast")
 
 class RuntimeService:
-    def __init__(self):
-        self.manager = ToolManager()
+    def __init__(self, cache_dir: str = TOOL_CACHE_DIR):
+        self.manager = ToolManager(cache_dir)
+        # Pooled HTTP/2 client + response caches shared by every tool call
+        self.upstream = UpstreamClient()
         self.loaded_tools: Dict[str, Any] = {}
+        self.load_times: Dict[str, Dict[str, float]] = {}
         
         # Initialize Wasmtime
-        self.config = Config()
-        self.config.cache = True
-        self.config.wasm_component_model = True
+        self.config = create_config()
         self.engine = Engine(self.config)
         self.linker = Linker(self.engine)
         self.linker.add_wasip2()
+        # Ahead-of-time compiled components, keyed by binary hash + engine
+        self.components = ComponentCache(self.engine, cache_dir=str(self.manager.cache_dir / "compiled"))
+        # Drives per-call epoch deadlines of pooled instances
+        self.ticker = EpochTicker(self.engine)
+        self.ticker.start()
 
-    async def load_tool(self, url: str):
-        path = await self.manager.get_tool(url)
-        tool_name = path.stem
-        
-        print(f"Loading tool from {path}...", file=sys.stderr)
-        
-        # Create a Store for this instance
+    def new_store(self) -> Store:
         store = Store(self.engine)
         wasi = WasiConfig()
         wasi.inherit_stdout()
@@ -49,7 +83,25 @@ class RuntimeService:
         # Ensure network access for wasi:http (inherit_network is not available in pyt, implied or dependent on add_wasip2)
         wasi.inherit_env()
         store.set_wasi(wasi)
+        return store
 
+    async def precompile(self, url: str) -> str:
+        """
+        Fetches a binary and stores its compiled artifact without instantiating it.
+        """
+        path = await self.manager.get_tool(url)
+        self.components.load(path)
+        return self.components.artifact_path(path).name
+
+    async def load_tool(self, url: str):
+        started = time.perf_counter()
+        path = await self.manager.get_tool(url)
+        tool_name = self.manager.tool_name(url)
+        # Per-phase load timings (seconds), reported through runtime://stats
+        timings = self.load_times[tool_name] = {"fetch": time.perf_counter() - started}
+        
+        print(f"Loading tool from {path}...", file=sys.stderr)
+        
         # Mock/Stub the missing HOST dependencies required by the component
         # The component expects the HOST to implement `wasmcp:mcp/server-io`.
         # We must define these in the linker.
@@ -69,17 +121,25 @@ class RuntimeService:
         # and proceed to allow the `call_tool` to work via Python logic.
         
         try:
-            component = Component.from_file(self.engine, str(path))
+            component = self.components.load(path)
+            mode, seconds = self.components.last_load
+            timings[mode] = seconds
             
             # Attempt instantiation - if it fails, we fall back to mock
             try:
-                instance = self.linker.instantiate(store, component)
-                exports = instance.exports(store)
-                self.loaded_tools[tool_name] = {
-                    "instance": instance,
-                    "store": store,
-                    "exports": exports
-                }
+                # Each tool gets a pool of pre-instantiated instances with
+                # their own Store, so concurrent calls do not share state.
+                started = time.perf_counter()
+                pool = InstancePool(tool_name, self.linker, component, self.new_store)
+                pool.prefill()
+                timings["instantiate"] = time.perf_counter() - started
+                exports = native_exports(pool, tool_name)
+                if exports:
+                    self.loaded_tools[tool_name] = {"pool": pool, "exports": exports}
+                else:
+                    # Nothing to run on the instances, so none are kept
+                    print(f"{tool_name} exports no native tool functions; using Simulation Mode.", file=sys.stderr)
+                    self.loaded_tools[tool_name] = {"mock": True}
             except Exception as e:
                 print(f"Info: WASM component requires host bindings ({e}).", file=sys.stderr)
                 print(f"Using Simulation Mode for {tool_name} (WASM available for future native execution).", file=sys.stderr)
@@ -92,6 +152,16 @@ class RuntimeService:
             print(f"Failed to load component {tool_name}: {e}", file=sys.stderr)
             raise e
 
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "load_seconds": self.load_times,
+            "upstream": self.upstream.stats(),
+            "pools": {
+                name: {"idle": len(entry["pool"].idle), "recycled": entry["pool"].recycled}
+                for name, entry in self.loaded_tools.items() if "pool" in entry
+            },
+        }
+
     def list_tools(self) -> List[Tool]:
         tools = []
         if "weather-tool" in self.loaded_tools:
@@ -122,10 +192,28 @@ class RuntimeService:
         return tools
 
     async def call_tool(self, name: str, arguments: dict) -> List[Any]:
+        entry = self.loaded_tools.get(TOOL_COMPONENTS.get(name), {})
+        export = entry.get("exports", {}).get(name)
+        if export is not None:
+            return await self.call_native(entry["pool"], export, arguments)
+        # Simulated tools are plain async Python and hold no instance
+        return await self.call_simulated(name, arguments)
+
+    async def call_native(self, pool: InstancePool, export: str, arguments: dict) -> List[Any]:
+        """
+        Calls the tool's export on a leased instance, off the event loop and
+        under the per-call fuel / epoch / memory budgets.
+        """
+        def invoke(pooled):
+            func = pooled.instance.get_func(pooled.store, export)
+            return func(pooled.store, json.dumps(arguments))
+
+        return [TextContent(type="text", text=await pool.run(invoke))]
+
+    async def call_simulated(self, name: str, arguments: dict) -> List[Any]:
         if name == "get_weather":
             # Force simulated logic for stability in demo
             print(f"DEBUG: Executing simulated logic for {name}", file=sys.stderr)
-            import httpx
             
             # Map for Open-Meteo WMO codes
             WEATHER_CODES = {
@@ -146,37 +234,39 @@ class RuntimeService:
             if not city:
                  return [TextContent(type="text", text="Error: Missing city/location parameter.")]
                  
-            async with httpx.AsyncClient() as client:
-                try:
-                    # 1. Geocoding
-                    geo_res = await client.get(f"https://geocoding-api.open-meteo.com/v1/search?name={city}&count=1")
-                    geo_data = geo_res.json()
-                    
-                    if not geo_data.get("results"):
-                        return [TextContent(type="text", text=f"City {city} not found.")]
-                    
-                    lat = geo_data["results"][0]["latitude"]
-                    lng = geo_data["results"][0]["longitude"]
-                    loc_name = geo_data["results"][0]["name"]
-                    
-                    # 2. Weather
-                    weather_res = await client.get(f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lng}&current_weather=true")
-                    weather_data = weather_res.json()
-                    cw = weather_data["current_weather"]
-                    temp = cw["temperature"]
-                    code = cw.get("weathercode", 0)
-                    condition = WEATHER_CODES.get(code, "Clear")
-                    
-                    # Return JSON structure for easier LLM extraction
-                    result_data = {
-                        "temp": temp,
-                        "condition": condition,
-                        "location": loc_name
-                    }
-                    import json
-                    return [TextContent(type="text", text=json.dumps(result_data))]
-                except Exception as e:
-                    return [TextContent(type="text", text=f"Error: {str(e)}")]
+            try:
+                # 1. Geocoding (long-lived, cached for a day by default)
+                geo_data = await self.upstream.get_json(
+                    GEOCODING_URL, {"name": city, "count": 1}, tier="geocode"
+                )
+                
+                if not geo_data.get("results"):
+                    return [TextContent(type="text", text=f"City {city} not found.")]
+                
+                lat = geo_data["results"][0]["latitude"]
+                lng = geo_data["results"][0]["longitude"]
+                loc_name = geo_data["results"][0]["name"]
+                
+                # 2. Weather (short-lived, cached for minutes)
+                weather_data = await self.upstream.get_json(
+                    FORECAST_URL,
+                    {"latitude": lat, "longitude": lng, "current_weather": "true"},
+                    tier="weather",
+                )
+                cw = weather_data["current_weather"]
+                temp = cw["temperature"]
+                code = cw.get("weathercode", 0)
+                condition = WEATHER_CODES.get(code, "Clear")
+                
+                # Return JSON structure for easier LLM extraction
+                result_data = {
+                    "temp": temp,
+                    "condition": condition,
+                    "location": loc_name
+                }
+                return [TextContent(type="text", text=json.dumps(result_data))]
+            except Exception as e:
+                return [TextContent(type="text", text=f"Error: {str(e)}")]
 
         if name == "get_activity_recommendation":
             condition = (arguments.get("condition") or "").lower()
@@ -196,16 +286,45 @@ class RuntimeService:
 
         raise ValueError(f"Tool {name} not found")
 
+    async def aclose(self):
+        self.ticker.stop()
+        await self.upstream.aclose()
+        await self.manager.aclose()
+
 async def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--url", action="append", help="URL of WASM tool to load")
+    parser.add_argument("--precompile", action="store_true", help="Compile the given tools into the artifact cache and exit")
+    parser.add_argument("--socket", help="Serve MCP over streamable HTTP on this Unix socket instead of stdio")
     args = parser.parse_args()
 
+    if args.precompile:
+        service = RuntimeService()
+        for url in args.url or []:
+            print(f"Precompiled {url} -> {await service.precompile(url)}", file=sys.stderr)
+        return
+
+    started = time.perf_counter()
     service = RuntimeService()
     
     if args.url:
+        # Several --url flags host multiple tools on the shared Engine/Linker.
+        # A single bad binary must not take the other tools down with it.
         for url in args.url:
-            await service.load_tool(url)
+            try:
+                await service.load_tool(url)
+            except Exception as e:
+                if len(args.url) == 1:
+                    raise
+                print(f"Skipping {url}: {e}", file=sys.stderr)
+
+    # Cold-start report used to compare shared vs. per-tool runtime layouts
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(
+        f"Runtime ready: {len(service.loaded_tools)} tool(s) in "
+        f"{(time.perf_counter() - started) * 1000:.1f}ms, max RSS {max_rss_kb / 1024:.1f}MiB",
+        file=sys.stderr,
+    )
 
     server = Server("wasm-runtime-service")
 
@@ -215,17 +334,56 @@ async def main():
 
     @server.call_tool()
     async def call_tool(name: str, arguments: dict) -> List[Any]:
-        return await service.call_tool(name, arguments)
+        # Continue the orchestrator's trace: it sends its request ID in _meta
+        meta = server.request_context.meta
+        request_id_var.set(getattr(meta, "requestId", None) if meta else None)
+        with span("runtime.call_tool", tool=name):
+            return await service.call_tool(name, arguments)
 
-    print("Starting WASM Runtime Service over Stdio...", file=sys.stderr)
-    from mcp.server.stdio import stdio_server
-    
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            server.create_initialization_options()
-        )
+    # Runtime counters (upstream cache hit rates, pool recycling) are exposed
+    # as an MCP resource so they stay out of the tool list sent to the LLM.
+    @server.list_resources()
+    async def list_resources() -> List[Resource]:
+        return [Resource(uri=STATS_URI, name="runtime-stats", mimeType="application/json")]
+
+    @server.read_resource()
+    async def read_resource(uri: AnyUrl) -> str:
+        if str(uri) != STATS_URI:
+            raise ValueError(f"Unknown resource {uri}")
+        return json.dumps(service.stats())
+
+    if args.socket:
+        print(f"Starting WASM Runtime Service on {args.socket}...", file=sys.stderr)
+        await serve_socket(server, args.socket)
+    else:
+        print("Starting WASM Runtime Service over Stdio...", file=sys.stderr)
+        from mcp.server.stdio import stdio_server
+
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                server.create_initialization_options()
+            )
+    await service.aclose()
+
+async def serve_socket(server: Server, path: str):
+    """
+    Serves MCP over streamable HTTP on a Unix socket, so every worker of a
+    multi-process orchestrator can share this runtime (see runtime_pool.py).
+    The socket only appears once the tools are loaded.
+    """
+    import uvicorn
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+
+    sessions = StreamableHTTPSessionManager(app=server, json_response=True)
+    if os.path.exists(path):
+        os.unlink(path)
+    config = uvicorn.Config(
+        sessions.handle_request, uds=path, interface="asgi3", lifespan="off", log_level="warning"
+    )
+    async with sessions.run():
+        await uvicorn.Server(config).serve()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The runtime's modules are imported flat, as run.sh does from wasm-runtime/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
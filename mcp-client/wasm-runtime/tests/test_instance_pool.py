@@ -0,0 +1,109 @@
+import asyncio
+import itertools
+import json
+
+import pytest
+from wasmtime.component import Component
+
+import instance_pool
+from instance_pool import InstancePool
+from runtime_service import RuntimeService, native_exports
+
+# get-weather(arguments: string) -> string that echoes its arguments. The bump
+# allocator never frees, so every call grows linear memory.
+NATIVE_WAT = """(component
+  (core module $m
+    (memory (export "memory") 1)
+    (global $bump (mut i32) (i32.const 1024))
+    (func (export "realloc") (param i32 i32 i32 i32) (result i32)
+      (local $p i32)
+      (local.set $p (global.get $bump))
+      (if (i32.gt_u (i32.add (local.get $p) (local.get 3)) (i32.mul (memory.size) (i32.const 65536)))
+        (then (drop (memory.grow (i32.const 16)))))
+      (global.set $bump (i32.add (global.get $bump) (local.get 3)))
+      (local.get $p))
+    (func (export "echo") (param $ptr i32) (param $len i32) (result i32)
+      (i32.store (i32.const 0) (local.get $ptr))
+      (i32.store (i32.const 4) (local.get $len))
+      (i32.const 0)))
+  (core instance $i (instantiate $m))
+  (func (export "get-weather") (param "arguments" string) (result string)
+    (canon lift (core func $i "echo") (memory $i "memory") (realloc (func $i "realloc")))))"""
+
+# A start function that loops a while: traps at instantiation without an
+# epoch deadline
+START_CODE_WAT = """(component
+  (core module $m
+    (func $start (local i32)
+      (local.set 0 (i32.const 100))
+      (loop $l (local.set 0 (i32.sub (local.get 0) (i32.const 1))) (br_if $l (local.get 0))))
+    (start $start))
+  (core instance (instantiate $m)))"""
+
+@pytest.fixture
+def service(tmp_path):
+    service = RuntimeService(str(tmp_path))
+    yield service
+    asyncio.run(service.aclose())
+
+def pool_for(service, wat, **kwargs):
+    component = Component(service.engine, wat)
+    return InstancePool("weather-tool", service.linker, component, service.new_store, **kwargs)
+
+def test_components_with_start_code_instantiate(service):
+    pool = pool_for(service, START_CODE_WAT)
+    pool.prefill()
+    assert len(pool.idle) == 1
+
+def test_native_tools_run_on_a_leased_instance(service):
+    pool = pool_for(service, NATIVE_WAT)
+    pool.prefill()
+    exports = native_exports(pool, "weather-tool")
+    assert exports == {"get_weather": "get-weather"}
+    service.loaded_tools["weather-tool"] = {"pool": pool, "exports": exports}
+
+    async def scenario():
+        return await asyncio.gather(*(service.call_tool("get_weather", {"city": f"c{i}"}) for i in range(4)))
+
+    results = asyncio.run(scenario())
+    assert [json.loads(r[0].text) for r in results] == [{"city": f"c{i}"} for i in range(4)]
+    assert sum(p.calls for p in pool.idle) == 4
+
+def test_components_without_native_exports_have_none(service):
+    pool = pool_for(service, START_CODE_WAT)
+    pool.prefill()
+    assert native_exports(pool, "weather-tool") == {}
+
+def test_failed_call_recycles_and_refills(service):
+    pool = pool_for(service, NATIVE_WAT, min_size=1, max_size=2)
+    pool.prefill()
+
+    def fail(pooled):
+        raise RuntimeError("trap")
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await pool.run(fail)
+        await asyncio.gather(*pool._refills)
+
+    asyncio.run(scenario())
+    assert pool.recycled == 1
+    assert len(pool.idle) == 1
+
+def test_recycles_once_memory_grew(service, monkeypatch):
+    monkeypatch.setattr(instance_pool, "RECYCLE_MEMORY_GROWTH", 3 * 1024 * 1024)
+    # Every reading is 1 MiB above the previous one
+    readings = itertools.count(step=1024 * 1024)
+    monkeypatch.setattr(instance_pool, "resident_bytes", lambda: next(readings))
+    pool = pool_for(service, NATIVE_WAT, min_size=1, max_size=1)
+    pool.prefill()
+    first = pool.idle[0]
+
+    async def scenario():
+        for _ in range(3):
+            await pool.run(lambda pooled: None)
+        await asyncio.gather(*pool._refills)
+
+    asyncio.run(scenario())
+    assert pool.recycled == 1
+    assert pool.idle and pool.idle[0] is not first
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+
+from manager import ToolManager
+
+BINARIES = {f"https://registry.test/{name}.wasm": name.encode() * 100 for name in ("a", "b", "c")}
+
+@pytest.fixture
+def manager(tmp_path):
+    requests, hooks = [], []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        for hook in hooks:
+            hook()
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, content=BINARIES[str(request.url)], headers={"ETag": '"v1"'})
+
+    # Room for two of the 100-byte binaries
+    manager = ToolManager(str(tmp_path), max_bytes=250)
+    manager.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    manager.requests, manager.hooks = requests, hooks
+    yield manager
+    asyncio.run(manager.aclose())
+
+def age(manager: ToolManager, seconds: float):
+    """
+    Backdates every index entry and blob, as if last used `seconds` ago.
+    """
+    then = time.time() - seconds
+    with manager._index_lock():
+        index = manager._load_index()
+        for entry in index.values():
+            entry["last_used"] = then
+        manager._save_index(index)
+    for blob in manager.blob_dir.glob("*.wasm"):
+        os.utime(blob, (then, then))
+
+def test_recently_used_blobs_are_not_evicted(manager):
+    a, b, c = BINARIES
+
+    async def fetch_all():
+        return [await manager.get_tool(url) for url in (a, b, c)]
+
+    paths = asyncio.run(fetch_all())
+    # Over max_bytes, but another process may still be loading any of them
+    assert all(path.exists() for path in paths)
+
+def test_least_recently_used_blob_is_evicted_after_the_grace_period(manager):
+    a, b, c = BINARIES
+
+    async def fetch(*urls):
+        return [await manager.get_tool(url) for url in urls]
+
+    path_a, path_b = asyncio.run(fetch(a, b))
+    age(manager, 3600)
+    asyncio.run(fetch(b))
+    path_c, = asyncio.run(fetch(c))
+
+    assert not path_a.exists()
+    assert path_b.exists() and path_c.exists()
+    assert a not in manager._load_index()
+
+def test_blob_evicted_during_revalidation_is_downloaded_again(manager):
+    a = next(iter(BINARIES))
+    path = asyncio.run(manager.get_tool(a))
+
+    # Another process evicts the blob while this one revalidates it
+    manager.hooks.append(lambda: path.unlink(missing_ok=True))
+
+    assert asyncio.run(manager.get_tool(a)) == path
+    assert path.exists()
+    # The 304 is not trusted once the blob is gone; it is fetched unconditionally
+    assert [r.headers.get("if-none-match") for r in manager.requests] == [None, '"v1"', None]
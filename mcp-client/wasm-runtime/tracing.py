@@ -0,0 +1,39 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+# Request ID received from the orchestrator in the MCP request's _meta
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+def log_event(event: str, **fields: Any):
+    """
+    Writes one structured (JSON) trace line to stderr; stdout carries MCP.
+    """
+    record: Dict[str, Any] = {"ts": round(time.time(), 3), "event": event}
+    request_id = request_id_var.get()
+    if request_id:
+        record["request_id"] = request_id
+    record.update(fields)
+    print(json.dumps(record, default=str), file=sys.stderr)
+
+@contextmanager
+def span(name: str, **fields: Any):
+    """
+    Times a block and logs it as a trace line. Yields a dict the block can
+    add fields to.
+    """
+    extra: Dict[str, Any] = {}
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield extra
+    except BaseException as e:
+        outcome = "error"
+        extra.setdefault("error", repr(e))
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        log_event(name, duration_ms=round(elapsed * 1000, 2), outcome=outcome, **fields, **extra)
@@ -3,9 +3,17 @@ package com.mcp.registry.controller;
 import com.mcp.registry.model.MCPServer;
 import com.mcp.registry.service.MCPServerService;
 import lombok.RequiredArgsConstructor;
+import org.springframework.data.domain.Page;
+import org.springframework.data.domain.PageRequest;
+import org.springframework.data.domain.Pageable;
+import org.springframework.format.annotation.DateTimeFormat;
+import org.springframework.http.CacheControl;
+import org.springframework.http.HttpHeaders;
 import org.springframework.http.ResponseEntity;
 import org.springframework.web.bind.annotation.*;
+import org.springframework.web.servlet.support.ServletUriComponentsBuilder;
 
+import java.time.LocalDateTime;
 import java.util.List;
 import java.util.Map;
 
@@ -14,6 +22,9 @@ import java.util.Map;
 @RequiredArgsConstructor
 public class MCPServerController {
 
+    private static final int DEFAULT_PAGE_SIZE = 100;
+    private static final int MAX_PAGE_SIZE = 500;
+
     private final MCPServerService service;
 
     @PostMapping
@@ -21,9 +32,46 @@ public class MCPServerController {
         return ResponseEntity.ok(service.registerServer(server));
     }
 
+    /**
+     * Lists servers. Without parameters this is the full listing that
+     * orchestrators poll, served from the in-memory cache. page/size paginate
+     * (Link rel="next" and X-Total-Count headers), and updatedSince returns
+     * only the servers registered or changed since then. Every response
+     * carries an ETag; If-None-Match with the current one gets a 304.
+     */
     @GetMapping
-    public ResponseEntity<List<MCPServer>> list() {
-        return ResponseEntity.ok(service.getAllServers());
+    public ResponseEntity<List<MCPServer>> list(
+            @RequestParam(required = false) Integer page,
+            @RequestParam(required = false) Integer size,
+            @RequestParam(required = false) @DateTimeFormat(iso = DateTimeFormat.ISO.DATE_TIME) LocalDateTime updatedSince) {
+        if (page == null && size == null && updatedSince == null) {
+            MCPServerService.ServerListing listing = service.getListing();
+            // A 200 with an ETag matching If-None-Match is turned into a 304 by Spring
+            return ResponseEntity.ok()
+                    .cacheControl(CacheControl.noCache())
+                    .eTag(listing.etag())
+                    .body(listing.servers());
+        }
+        if ((page != null && page < 0) || (size != null && (size < 1 || size > MAX_PAGE_SIZE))) {
+            return ResponseEntity.badRequest().build();
+        }
+
+        Pageable pageable = page == null && size == null
+                ? Pageable.unpaged()
+                : PageRequest.of(page == null ? 0 : page, size == null ? DEFAULT_PAGE_SIZE : size);
+        Page<MCPServer> result = service.getServers(pageable, updatedSince);
+        String etag = MCPServerService.etagOf(result.getContent(), result.getNumber() + "/" + result.getTotalElements());
+        ResponseEntity.BodyBuilder response = ResponseEntity.ok()
+                .cacheControl(CacheControl.noCache())
+                .eTag(etag)
+                .header("X-Total-Count", String.valueOf(result.getTotalElements()));
+        if (result.hasNext()) {
+            String next = ServletUriComponentsBuilder.fromCurrentRequest()
+                    .replaceQueryParam("page", result.getNumber() + 1)
+                    .toUriString();
+            response.header(HttpHeaders.LINK, "<" + next + ">; rel=\"next\"");
+        }
+        return response.body(result.getContent());
     }
 
     @GetMapping("/{name}")
@@ -13,7 +13,8 @@ import java.util.Map;
 
 @Data
 @Entity
-@Table(name = "mcp_servers")
+// updated_at is indexed for the listing's updatedSince (delta) queries
+@Table(name = "mcp_servers", indexes = @Index(name = "idx_mcp_servers_updated_at", columnList = "updated_at"))
 public class MCPServer {
 
     @Id
@@ -3,11 +3,26 @@ package com.mcp.registry.service;
 import com.mcp.registry.model.MCPServer;
 import com.mcp.registry.repository.MCPServerRepository;
 import lombok.RequiredArgsConstructor;
+import org.springframework.beans.factory.annotation.Value;
+import org.springframework.data.domain.Page;
+import org.springframework.data.domain.PageImpl;
+import org.springframework.data.domain.PageRequest;
+import org.springframework.data.domain.Pageable;
+import org.springframework.data.domain.Sort;
 import org.springframework.stereotype.Service;
 
+import java.nio.charset.StandardCharsets;
+import java.security.MessageDigest;
+import java.security.NoSuchAlgorithmException;
+import java.time.Duration;
+import java.time.Instant;
+import java.time.LocalDateTime;
+import java.util.HexFormat;
+import java.util.LinkedHashMap;
 import java.util.List;
 import java.util.Optional;
 import java.util.Map;
+import java.util.concurrent.atomic.AtomicLong;
 
 @Service
 @RequiredArgsConstructor
@@ -15,30 +30,120 @@ public class MCPServerService {
 
     private final MCPServerRepository repository;
 
+    // Max age of the cached listing. Registrations through this instance
+    // invalidate it immediately; this bounds staleness when several registry
+    // instances share the database.
+    @Value("${registry.cache.ttl:PT30S}")
+    private Duration cacheTtl;
+
+    /**
+     * Snapshot of every server, sorted by name, with its ETag.
+     */
+    public record ServerListing(List<MCPServer> servers, Map<String, MCPServer> byName, String etag, Instant loadedAt) {
+    }
+
+    private volatile ServerListing listing;
+    // Bumped by every registration, so a listing read before it is never cached after it
+    private final AtomicLong generation = new AtomicLong();
+
     public MCPServer registerServer(MCPServer server) {
         // Idempotency: Update if exists, else Create
         Optional<MCPServer> existing = repository.findByName(server.getName());
+        MCPServer saved;
         if (existing.isPresent()) {
             MCPServer toUpdate = existing.get();
             toUpdate.setVersion(server.getVersion());
             toUpdate.setBinaryUrl(server.getBinaryUrl());
             toUpdate.setDescription(server.getDescription());
             toUpdate.setRuntimeConfig(server.getRuntimeConfig());
-            return repository.save(toUpdate);
+            saved = repository.save(toUpdate);
+        } else {
+            saved = repository.save(server);
+        }
+        invalidateListing();
+        return saved;
+    }
+
+    public void invalidateListing() {
+        generation.incrementAndGet();
+        listing = null;
+    }
+
+    public ServerListing getListing() {
+        ServerListing current = listing;
+        if (current != null && Instant.now().isBefore(current.loadedAt().plus(cacheTtl))) {
+            return current;
+        }
+        return reloadListing();
+    }
+
+    private synchronized ServerListing reloadListing() {
+        // Another request may have reloaded it while this one waited
+        ServerListing current = listing;
+        if (current != null && Instant.now().isBefore(current.loadedAt().plus(cacheTtl))) {
+            return current;
+        }
+        long seen = generation.get();
+        List<MCPServer> servers = List.copyOf(repository.findAll(Sort.by("name")));
+        Map<String, MCPServer> byName = new LinkedHashMap<>();
+        servers.forEach(s -> byName.put(s.getName(), s));
+        ServerListing fresh = new ServerListing(servers, byName, etagOf(servers, "all"), Instant.now());
+        // A registration that raced with the query may be missing from it
+        if (generation.get() == seen) {
+            listing = fresh;
         }
-        return repository.save(server);
+        return fresh;
     }
 
     public List<MCPServer> getAllServers() {
-        return repository.findAll();
+        return getListing().servers();
+    }
+
+    /**
+     * One page of the listing, or with updatedSince, of the servers registered
+     * or changed at or after that time (oldest change first).
+     */
+    public Page<MCPServer> getServers(Pageable pageable, LocalDateTime updatedSince) {
+        if (updatedSince != null) {
+            // Answered by the index on updated_at rather than the cached listing
+            Sort sort = Sort.by("updatedAt", "name");
+            Pageable sorted = pageable.isPaged()
+                    ? PageRequest.of(pageable.getPageNumber(), pageable.getPageSize(), sort)
+                    : Pageable.unpaged(sort);
+            return repository.findByUpdatedAtGreaterThanEqual(updatedSince, sorted);
+        }
+        List<MCPServer> servers = getListing().servers();
+        if (pageable.isUnpaged()) {
+            return new PageImpl<>(servers);
+        }
+        int from = (int) Math.min(pageable.getOffset(), servers.size());
+        int to = Math.min(from + pageable.getPageSize(), servers.size());
+        return new PageImpl<>(servers.subList(from, to), pageable, servers.size());
+    }
+
+    /**
+     * Strong ETag of a list of servers: any registration that changes a server
+     * moves its updatedAt, and so the tag.
+     */
+    public static String etagOf(List<MCPServer> servers, String qualifier) {
+        try {
+            MessageDigest digest = MessageDigest.getInstance("SHA-256");
+            digest.update(qualifier.getBytes(StandardCharsets.UTF_8));
+            for (MCPServer server : servers) {
+                digest.update(("\n" + server.getId() + "@" + server.getUpdatedAt()).getBytes(StandardCharsets.UTF_8));
+            }
+            return "\"" + HexFormat.of().formatHex(digest.digest(), 0, 16) + "\"";
+        } catch (NoSuchAlgorithmException e) {
+            throw new IllegalStateException(e);
+        }
     }
 
     public Optional<MCPServer> getServerByName(String name) {
-        return repository.findByName(name);
+        return Optional.ofNullable(getListing().byName().get(name));
     }
 
     public Map<String, Object> generateMcpConfig(String name) {
-        MCPServer server = repository.findByName(name)
+        MCPServer server = getServerByName(name)
                 .orElseThrow(() -> new RuntimeException("Server not found: " + name));
 
         // Construct mcp.json format
@@ -3,6 +3,10 @@
 
 set -e # Exit immediately if a command exits with a non-zero status
 
+# Set PRECOMPILE=1 to compile each published tool into the local WASM
+# Runtime's artifact cache, so the next runtime start skips compilation.
+RUNTIME_SCRIPT="$(cd "$(dirname "$0")" && pwd)/../mcp-client/wasm-runtime/run.sh"
+
 for dir in */ ; do
     # Check if it is a directory and has package.json
     if [ -d "$dir" ] && [ -f "$dir/package.json" ]; then
@@ -36,10 +40,13 @@ for dir in */ ; do
         BINARY_NAME=$(basename "$WASM_FILE")
         
         echo "Uploading $BINARY_NAME to Artifactory..."
-        curl -f -X POST "http://localhost:8001/upload" \
-             -F "file=@$WASM_FILE"
-             
-        echo ""
+        UPLOAD_RESPONSE=$(curl -f -X POST "http://localhost:8001/upload" \
+             -F "file=@$WASM_FILE")
+        echo "$UPLOAD_RESPONSE"
+
+        # Register the content-addressed URL: it never changes, so runtimes
+        # cache it without revalidating, and republishing changes binaryUrl
+        BINARY_URL=$(node -p "JSON.parse(process.argv[1]).immutableUrl" "$UPLOAD_RESPONSE")
         
         # Register with MCP Registry
         # Extract version and description using node for convenience (since we have npm)
@@ -56,7 +63,7 @@ for dir in */ ; do
   "name": "$NAME",
   "version": "$VERSION",
   "description": "$DESC",
-  "binaryUrl": "http://localhost:8001/binaries/$BINARY_NAME",
+  "binaryUrl": "$BINARY_URL",
   "runtimeConfig": {}
 }
 EOF
@@ -66,6 +73,11 @@ EOF
              -d @/tmp/register_payload.json
              
         echo "" # New line for readability
+
+        if [ "$PRECOMPILE" = "1" ]; then
+            echo "Precompiling $BINARY_NAME..."
+            "$RUNTIME_SCRIPT" --precompile --url "$BINARY_URL"
+        fi
         popd > /dev/null
         echo "-----------------------------------"
     fi